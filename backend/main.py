@@ -1,8 +1,13 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
+from typing import Optional
+import hmac
+import importlib
 import os
+import time
 
 # 환경 변수 로드
 load_dotenv()
@@ -32,42 +37,90 @@ async def root():
 async def health_check():
     return {"status": "healthy", "port": os.getenv("PORT", "8000")}
 
+@app.get("/health/vectorstores")
+def vectorstore_health(index_name: Optional[str] = None):
+    from services.vector_loader import check_vectorstore_health
+    return check_vectorstore_health([index_name] if index_name else None)
+
+@app.post("/vectorstores/reload")
+def vectorstore_reload(index_name: Optional[str] = None, x_admin_token: Optional[str] = Header(None)):
+    # 운영 중 컬렉션 재적재 후 호출 (ADMIN_TOKEN 필요)
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token or not hmac.compare_digest((x_admin_token or "").encode(), admin_token.encode()):
+        raise HTTPException(status_code=403, detail="권한 없음")
+    from services.vector_loader import reload_vectorstore
+    reload_vectorstore(index_name)
+    return {"reloaded": index_name or "all"}
+
 # 라우터 import 및 등록 (오류 방지)
-try:
-    from routers.chat_product import router as chat_router
-    app.include_router(chat_router, prefix="/chat")
-except ImportError as e:
-    print(f"Warning: chat_router import failed: {e}")
+# ✅ 라우터별 import 시간 기록 (/ready 응답에 포함 → 콜드 스타트 병목 확인용)
+import_timings = {}
 
-try:
-    from routers.template_router import router as template_router
-    app.include_router(template_router, prefix="/template")
-except ImportError as e:
-    print(f"Warning: template_router import failed: {e}")
+def include_router_module(module_name: str, prefix: str):
+    start = time.perf_counter()
+    try:
+        module = importlib.import_module(module_name)
+        app.include_router(module.router, prefix=prefix)
+    except ImportError as e:
+        print(f"Warning: {module_name.split('.')[-1]} import failed: {e}")
+    finally:
+        import_timings[module_name] = round(time.perf_counter() - start, 3)
+        print(f"⏱️ {module_name} import: {import_timings[module_name]}s")
 
-try:
-    from routers.auth_router import router as auth_router
-    app.include_router(auth_router, prefix="/auth")
-except ImportError as e:
-    print(f"Warning: auth_router import failed: {e}")
+include_router_module("routers.chat_product", "/chat")
+include_router_module("routers.template_router", "/template")
+include_router_module("routers.auth_router", "/auth")
+include_router_module("routers.user_router", "/user")
+include_router_module("routers.environment_router", "/environment")
+include_router_module("routers.indicator_router", "/indicator")
 
-try:
-    from routers.user_router import router as user_router
-    app.include_router(user_router, prefix="/user")
-except ImportError as e:
-    print(f"Warning: user_router import failed: {e}")
+# ✅ 준비 상태: 백그라운드 워밍업(임베딩 모델, 엑셀 등)이 끝나야 200
+#   /health 는 프로세스 생존 여부만, /ready 는 트래픽을 받아도 되는지
+@app.get("/ready")
+async def readiness_check():
+    from services.warmup import readiness
+    status = readiness()
+    status["import_seconds"] = import_timings
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
 
-try:
-    from routers.environment_router import router as environment_router
-    app.include_router(environment_router, prefix="/environment")
-except ImportError as e:
-    print(f"Warning: environment_router import failed: {e}")
+@app.on_event("startup")
+def start_warmup():
+    from services.warmup import start_background_warmup
+    start_background_warmup()
 
-try:
-    from routers.indicator_router import router as indicator_router
-    app.include_router(indicator_router, prefix="/indicator")
-except ImportError as e:
-    print(f"Warning: indicator_router import failed: {e}")
+# ✅ 표/이미지 매니페스트 미리 로딩 (요청마다 glob 하지 않도록)
+@app.on_event("startup")
+def load_asset_manifests():
+    # 경로만 필요 → 라우터(pandas / langchain / Qdrant 설정)를 import하지 않음
+    from services.asset_manifest import preload_manifests
+    from services.asset_paths import MANUAL_TABLE_DIR, SASB_TABLE_DIR
+    preload_manifests([(MANUAL_TABLE_DIR, "tables"), (SASB_TABLE_DIR, "tables")])
+
+# ✅ MongoDB 인덱스 (topic/company, user_id/topic) + 종료 시 클라이언트 정리
+@app.on_event("startup")
+async def create_mongo_indexes():
+    try:
+        from services.data_access import ensure_indexes
+        await ensure_indexes()
+    except Exception as e:
+        print(f"Warning: Mongo index creation failed: {e}")
+
+@app.on_event("shutdown")
+def close_mongo_client():
+    from services.data_access import close_client
+    close_client()
+
+# ✅ PDF 렌더링 프로세스 풀 정리
+@app.on_event("shutdown")
+def shutdown_pdf_renderer():
+    from services import pdf_renderer
+    pdf_renderer.shutdown()
+
+# ✅ bcrypt 해시 스레드풀 정리
+@app.on_event("shutdown")
+def shutdown_password_hasher():
+    from services import password_hashing
+    password_hashing.shutdown()
 
 # Static files (디렉토리가 존재할 때만)
 try:
@@ -1,47 +1,59 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Request
 from .models.user_schema import UserCreate, UserLogin, UserOut
-from services.database import users_collection
-from passlib.context import CryptContext
-from jose import jwt
-from datetime import datetime, timedelta
-from bson import ObjectId
-from services.jwt_utils import get_current_user  # ✅ 중요: 현재 사용자 추출 함수
-
-import os
-SECRET_KEY = os.getenv("JWT_SECRET_KEY", "eri1")
-ALGORITHM = "HS256"
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from services.data_access import find_user_by_email, insert_user, update_user
+from services.password_hashing import hash_password, verify_password, verify_dummy
+from services.login_limiter import check_login_allowed, client_ip, record_login_failure, record_login_success
+from services.jwt_utils import get_current_user, create_access_token, revoke_user_tokens  # ✅ 중요: 현재 사용자 추출 함수
 
 router = APIRouter()
 
 # ✅ 회원가입
 @router.post("/register", response_model=UserOut)
-def register(user: UserCreate):
-    if users_collection.find_one({"email": user.email}):
+async def register(user: UserCreate):
+    if await find_user_by_email(user.email):
         raise HTTPException(status_code=400, detail="이미 등록된 이메일입니다.")
     
-    hashed_pw = pwd_context.hash(user.password)
-    result = users_collection.insert_one({
+    # bcrypt는 전용 풀에서 (대기열이 가득 차면 503)
+    hashed_pw = await hash_password(user.password)
+    user_id = await insert_user({
         "email": user.email,
         "password": hashed_pw
     })
-    return {"id": str(result.inserted_id), "email": user.email}
+    return {"id": user_id, "email": user.email}
 
 # ✅ 로그인
 @router.post("/login")
-def login(user: UserLogin):
-    found = users_collection.find_one({"email": user.email})
-    if not found or not pwd_context.verify(user.password, found["password"]):
+async def login(user: UserLogin, request: Request):
+    # 시도 제한 (bcrypt 검증 전에 확인)
+    check_login_allowed(user.email, client_ip(request))
+
+    found = await find_user_by_email(user.email)
+    if found:
+        verified, new_hash = await verify_password(user.password, found["password"])
+    else:
+        # 없는 이메일도 bcrypt 1회 → 응답 시간 차이로 가입 여부 노출 방지
+        await verify_dummy(user.password)
+        verified, new_hash = False, None
+    if not verified:
+        record_login_failure(user.email)
         raise HTTPException(status_code=401, detail="이메일 또는 비밀번호가 올바르지 않습니다.")
+    record_login_success(user.email)
+
+    # 해시 설정(rounds 등)이 바뀐 이전 해시 → 로그인 시 재해시
+    if new_hash:
+        await update_user(str(found["_id"]), {"password": new_hash})
     
-    token_data = {
-        "sub": str(found["_id"]),
-        "exp": datetime.utcnow() + timedelta(minutes=60)
-    }
-    token = jwt.encode(token_data, SECRET_KEY, algorithm=ALGORITHM)
+    # sub / email / ver claim → 이후 요청은 DB 조회 없이 확인
+    token = create_access_token(found)
     return {"access_token": token, "token_type": "bearer"}
 
 # ✅ 로그인 사용자 조회
 @router.get("/me", response_model=UserOut)
-def read_current_user(user: dict = Depends(get_current_user)):
+async def read_current_user(user: dict = Depends(get_current_user)):
     return user
+
+# ✅ 모든 기기에서 로그아웃 (발급된 토큰 전부 무효화)
+@router.post("/logout-all")
+async def logout_all(user: dict = Depends(get_current_user)):
+    await revoke_user_tokens(user["id"])
+    return {"message": "✅ 모든 토큰이 만료되었습니다"}
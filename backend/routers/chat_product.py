@@ -1,6 +1,8 @@
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from services.rag_router import ask_with_context  # services에서 import
+from services.rag_router import ask_with_context_async, stream_with_context, response_cache  # services에서 import
+import json
 
 router = APIRouter()
 
@@ -8,6 +10,29 @@ class ChatRequest(BaseModel):
     message: str
 
 @router.post("/rag")
-def chat_rag(req: ChatRequest):
-    result = ask_with_context(req.message)
-    return result
\ No newline at end of file
+async def chat_rag(req: ChatRequest):
+    # ✅ async 파이프라인 → 워커 스레드를 점유하지 않음
+    result = await ask_with_context_async(req.message)
+    return result
+
+@router.post("/rag/stream")
+async def chat_rag_stream(req: ChatRequest):
+    # ✅ NDJSON 스트리밍: 한 줄에 프레임 하나
+    async def frames():
+        try:
+            async for frame in stream_with_context(req.message):
+                yield json.dumps(frame, ensure_ascii=False) + "\n"
+        except Exception as e:
+            print("❌ 스트리밍 응답 실패:", e)
+            yield json.dumps({"type": "error", "detail": str(e)}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(
+        frames(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/cache-stats")
+def chat_cache_stats():
+    # ✅ 응답 캐시 적중/미스 지표
+    return response_cache.stats() if response_cache else {"enabled": False}
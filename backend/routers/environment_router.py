@@ -1,6 +1,5 @@
-from fastapi import APIRouter, Body, Request
+from fastapi import APIRouter, Body, Request, Response
 from pydantic import BaseModel
-from services.vector_loader import load_vectorstore
 from bs4 import BeautifulSoup
 from pathlib import Path
 from typing import List, Optional
@@ -9,21 +8,40 @@ import os
 import re
 from langchain.chat_models import ChatOpenAI
 from langchain.schema import SystemMessage, HumanMessage
-from services.draft_store import save_draft, load_draft
+from services.draft_store import save_draft, load_draft, delete_draft, save_drafts_bulk, load_drafts_bulk
 from fastapi import HTTPException
 from pydantic import BaseModel
 from bs4 import BeautifulSoup
-import difflib
 from difflib import SequenceMatcher
 from typing import Dict, Any
-from services.draft_store import save_input_data, load_input_data
-from services.db import draft_collection, input_collection 
+from services.draft_store import save_input_data, load_input_data, indicator_statuses
+from services.draft_store import save_input_data_bulk, load_input_data_bulk
+from services.draft_store import complete_indicator as mark_indicator_completed
+from services.field_dedup import FieldDeduplicator, normalize
+from services.indicator_bundles import get_bundle_store
+from services.asset_paths import MANUAL_TABLE_DIR
+from services.llm_result_cache import cache_key, llm_result_cache_from_env
+import hashlib
 
 
 router = APIRouter()
 print("✅ environment_router (fetch-only) loaded")
 
-TABLE_DIR = Path(__file__).resolve().parent.parent / "extracted/2025_Sustainable_Management_Manual_split/tables"
+TABLE_DIR = MANUAL_TABLE_DIR
+bundle_store = get_bundle_store("esg_Manual", TABLE_DIR)
+
+# ✅ summarize-indicator / infer-required-data 결과 캐시 (프롬프트나 파싱 규칙을 바꾸면 버전 올리기)
+LLM_PROMPT_VERSION = "v1"
+# 모델 설정은 ChatOpenAI 생성과 캐시 키에 같은 dict를 사용
+INFER_LLM_SETTINGS = {"model": "gpt-4o", "temperature": 0.3, "max_tokens": 1024}
+SUMMARY_LLM_SETTINGS = {"model": "gpt-4o", "temperature": 0.3}
+llm_result_cache = llm_result_cache_from_env()
+
+
+def cached_llm_call(key: str, compute, meta: dict) -> str:
+    if llm_result_cache is None:
+        return compute()
+    return llm_result_cache.get_or_compute(key, compute, meta)
 
 class DeleteDraftRequest(BaseModel):
     topic: str
@@ -68,86 +86,103 @@ class SaveInputsRequest(BaseModel):
 
 
 @router.post("/save-inputs")
-def save_inputs(req: SaveInputsRequest):
+async def save_inputs(req: SaveInputsRequest):
     data = {
         "inputs": req.inputs,
         "table": req.table,
         "improvement": req.improvement,
     }
-    save_input_data(f"{req.topic}__input", req.company, data)
+    await save_input_data(f"{req.topic}__input", req.company, data)
     return {"message": "✅ 입력값 임시 저장됨"}
 
 @router.get("/load-inputs")
-def load_inputs(topic: str, company: str):
-    data = load_input_data(f"{topic}__input", company)
+async def load_inputs(topic: str, company: str):
+    data = await load_input_data(f"{topic}__input", company)
     return {"inputs": data or {}}
 
 
+# ✅ 일괄 저장/조회 (보고서 작업공간 전체를 한 번에)
+class TopicCompany(BaseModel):
+    topic: str
+    company: str
 
+class BulkLoadRequest(BaseModel):
+    items: List[TopicCompany]
 
-@router.post("/fetch-data")
-def fetch_data(req: FetchDataRequest):
-    # ✅ 1. 벡터스토어 로딩 및 필터링
-    vectorstore = load_vectorstore("esg_Manual")
-    all_docs = list(vectorstore.docstore._dict.values())
-
-    filtered = [
-        doc for doc in all_docs
-        if req.topic in (doc.metadata.get("title") or "")
+class BulkSaveInputsRequest(BaseModel):
+    items: List[SaveInputsRequest]
+
+class DraftItem(BaseModel):
+    topic: str
+    company: str
+    draft: str
+
+class BulkSaveDraftsRequest(BaseModel):
+    items: List[DraftItem]
+
+
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "500"))
+
+
+def check_bulk_size(items):
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {BULK_MAX_ITEMS}개까지 요청할 수 있습니다.")
+
+
+def bulk_save_response(items, result: dict) -> dict:
+    failed = [
+        {"topic": items[err["index"]].topic, "company": items[err["index"]].company, "error": err["error"]}
+        for err in result["errors"]
     ]
-    filtered = sorted(filtered, key=lambda d: d.metadata.get("chunk_id", ""))
-
-    # ✅ 2. 관련 페이지 추출 (pages 필드 기반, 다양한 형식 대응)
-    pages = set()
-    for doc in filtered:
-        raw_pages = doc.metadata.get("pages", [])
-        if isinstance(raw_pages, list):
-            pages.update(raw_pages)
-        elif isinstance(raw_pages, int):
-            pages.add(raw_pages)
-        elif isinstance(raw_pages, str):
-            try:
-                parsed = json.loads(raw_pages) if raw_pages.startswith("[") else eval(raw_pages)
-                if isinstance(parsed, list):
-                    pages.update(parsed)
-                elif isinstance(parsed, int):
-                    pages.add(parsed)
-            except Exception as e:
-                print(f"❌ pages 파싱 실패: {raw_pages} → {e}")
-
-    # ✅ 3. 관련 표 로딩
-    table_htmls, table_texts, table_paths = [], [], []
-    for page in sorted(pages):
-        for path in TABLE_DIR.glob(f"page{page}_table*.html"):
-            try:
-                soup = BeautifulSoup(path.read_text(encoding="utf-8"), "html.parser")
-                table = soup.find("table")
-                if table:
-                    table_htmls.append(str(table))
-                    table_texts.append(soup.get_text(separator="\n", strip=True))
-                    table_paths.append(str(path))
-            except Exception as e:
-                print(f"❌ 표 파싱 실패: {path} → {e}")
-
-    # ✅ 로그 출력
-    print("📄 추출된 페이지:", sorted(pages))
-    print("📊 로딩된 표 개수:", len(table_htmls))
-    print("🧪 첫 번째 표 HTML:", table_htmls[0] if table_htmls else "❌ 없음")
-    print(TABLE_DIR.exists())
-
-    # ✅ 4. 응답
-    return {
-        "topic": req.topic,
+    return {"saved": result["saved"], "failed": failed}
+
+
+@router.post("/save-inputs/bulk")
+async def save_inputs_bulk(req: BulkSaveInputsRequest):
+    check_bulk_size(req.items)
+    result = await save_input_data_bulk([
+        (f"{item.topic}__input", item.company,
+         {"inputs": item.inputs, "table": item.table, "improvement": item.improvement})
+        for item in req.items
+    ])
+    return bulk_save_response(req.items, result)
+
+@router.post("/load-inputs/bulk")
+async def load_inputs_bulk(req: BulkLoadRequest):
+    check_bulk_size(req.items)
+    found = await load_input_data_bulk([(f"{item.topic}__input", item.company) for item in req.items])
+    return {"items": [
+        {
+            "topic": item.topic,
+            "company": item.company,
+            "found": (f"{item.topic}__input", item.company) in found,
+            "inputs": found.get((f"{item.topic}__input", item.company)) or {},
+        }
+        for item in req.items
+    ]}
+
+
+
+
+@router.post("/fetch-data")
+def fetch_data(req: FetchDataRequest, request: Request):
+    # ✅ topic별 번들 (청크 / pages / 표) → 메모리·디스크 캐시 조회, 없을 때만 생성
+    bundle = bundle_store.get(req.topic)
+
+    # ✅ 요청별 필드만 뒤에 붙여서 응답 (번들 JSON은 다시 직렬화하지 않음)
+    extra = json.dumps({
         "company": req.company,
         "department": req.department,
-        "history": req.history,
-        "chunk_count": len(filtered),
-        "chunks": [doc.page_content for doc in filtered],
-        "table_htmls": table_htmls,
-        "table_paths": table_paths,
-        "table_texts": table_texts,
-        "pages": sorted(pages)
-    }
+        "history": [h.dict() for h in req.history or []],
+    }, ensure_ascii=False, separators=(",", ":"))
+    etag = '"' + hashlib.sha256(f"{bundle.etag}:{extra}".encode("utf-8")).hexdigest()[:32] + '"'
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    print(f"📦 fetch-data 번들: {req.topic} (페이지 {bundle.data['pages']}, 표 {len(bundle.data['table_htmls'])}개)")
+    body = bundle.body[:-1] + "," + extra[1:]
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 
 from langchain_community.chat_models import ChatOpenAI
@@ -278,44 +313,18 @@ def extract_table_fieldnames(table_texts: List[str]) -> List[str]:
     return sorted(fieldnames)
 
 def is_redundant(llm_field: str, table_fields: List[str], threshold=0.8) -> bool:
-    llm_norm = normalize(llm_field)
-
-    for table_field in table_fields:
-        table_norm = normalize(table_field)
-
-        # 1. 기존 유사도 기준
-        ratio = difflib.SequenceMatcher(None, llm_norm, table_norm).ratio()
-        if ratio >= threshold:
-            return True
-
-        # ✅ 2. 포함 관계 기준 (한쪽이 다른 쪽에 포함되면 중복으로 간주)
-        if llm_norm in table_norm or table_norm in llm_norm:
-            return True
-
-    return False
-
-
-def normalize(text: str) -> str:
-    return re.sub(r"[\s()%/+\-.,]", "", text).lower()
+    return FieldDeduplicator(table_fields, threshold).is_redundant(llm_field)
 
 def is_similar(a: str, b: str, threshold=0.8) -> bool:
     return SequenceMatcher(None, normalize(a), normalize(b)).ratio() >= threshold
 
 def remove_duplicate_fields(required_fields, table_fieldnames):
-    return [
-        field for field in required_fields
-        if all(not is_similar(field["항목"], tf) for tf in table_fieldnames)
-    ]
+    return FieldDeduplicator(table_fieldnames).remove_duplicates(required_fields)
 
 
 @router.post("/infer-required-data")
 def infer_required_data(req: InferDataRequest):
-    llm = ChatOpenAI(
-        model="gpt-4o",
-        temperature=0.3,
-        max_tokens=1024,
-        openai_api_key=os.getenv("OPENAI_API_KEY")
-    )
+    llm = ChatOpenAI(**INFER_LLM_SETTINGS, openai_api_key=os.getenv("OPENAI_API_KEY"))
 
     # 🧠 시스템 지침
     system = SystemMessage(content="""
@@ -380,26 +389,29 @@ def infer_required_data(req: InferDataRequest):
     table_fieldnames = extract_table_fieldnames(req.table_texts)
 
     try:
-        response = llm.invoke([system, user])
-        print("📤 LLM 응답 원문:\n", response.content)
-        parsed_fields = parse_markdown_to_fields(response.content)
-
-        # ✅ 중복 필터링 적용
-        filtered_fields = [f for f in parsed_fields if "항목" in f and not is_redundant(f["항목"], table_fieldnames)]
+        # ✅ 같은 입력(청크/표/프롬프트)이면 캐시된 응답 재사용, 동시 첫 요청은 호출 1회 공유
+        key = cache_key("infer-required-data", req.topic, req.chunks, req.table_texts,
+                        f"{LLM_PROMPT_VERSION}:{system.content}", INFER_LLM_SETTINGS)
+        content = cached_llm_call(key, lambda: llm.invoke([system, user]).content,
+                                  {"endpoint": "infer-required-data", "topic": req.topic})
+        print("📤 LLM 응답 원문:\n", content)
+        parsed_fields = parse_markdown_to_fields(content)
+
+        # ✅ 중복 필터링 적용 (표 항목은 한 번만 정규화/색인)
+        dedup = FieldDeduplicator(table_fieldnames)
+        filtered_fields = [f for f in parsed_fields if "항목" in f and not dedup.is_redundant(f["항목"])]
         print("✅ 필터링 후 남은 항목:", [f["항목"] for f in filtered_fields])
 
         # ✅ 로그 추가 (이 아래 줄들)
         print("📌 LLM 추천 항목:", [f["항목"] for f in parsed_fields])
-
-        table_fieldnames = extract_table_fieldnames(req.table_texts)
         print("📋 추출된 표 항목:", table_fieldnames)
 
-        filtered_fields = remove_duplicate_fields(parsed_fields, table_fieldnames)
+        filtered_fields = dedup.remove_duplicates(parsed_fields)
         print("✅ 필터링 후 남은 항목:", [f["항목"] for f in filtered_fields])
 
         return {
             "topic": req.topic,
-            "required_data": response.content,
+            "required_data": content,
             "required_fields": filtered_fields
         }
     except Exception as e:
@@ -640,7 +652,7 @@ def generate_draft(req: DraftRequest):
 
 @router.post("/summarize-indicator")
 def summarize_indicator(req: InferDataRequest):
-    llm = ChatOpenAI(model="gpt-4o", temperature=0.3, openai_api_key=os.getenv("OPENAI_API_KEY"))
+    llm = ChatOpenAI(**SUMMARY_LLM_SETTINGS, openai_api_key=os.getenv("OPENAI_API_KEY"))
 
     system = SystemMessage(content="""
 너는 ESG 보고서를 작성하는 전문가야.
@@ -657,8 +669,11 @@ def summarize_indicator(req: InferDataRequest):
     user = HumanMessage(content=f"[지표 ID: {req.topic}]\n\n{chunks}")
 
     try:
-        res = llm.invoke([system, user])
-        return {"summary": res.content.strip()}
+        key = cache_key("summarize-indicator", req.topic, req.chunks, [],
+                        f"{LLM_PROMPT_VERSION}:{system.content}", SUMMARY_LLM_SETTINGS)
+        summary = cached_llm_call(key, lambda: llm.invoke([system, user]).content,
+                                  {"endpoint": "summarize-indicator", "topic": req.topic})
+        return {"summary": summary.strip()}
     except Exception as e:
         print("❌ 요약 실패:", e)
         return {"summary": "요약 실패"}
@@ -671,46 +686,40 @@ async def save_draft_api(req: Request):  # ✅ async def
     topic = data.get("topic")
     company = data.get("company")
     draft = data.get("draft")
-    save_draft(topic, company, draft)
+    await save_draft(topic, company, draft)
     return {"message": "✅ Draft saved"}
 
+@router.post("/save-draft/bulk")
+async def save_drafts_bulk_api(req: BulkSaveDraftsRequest):
+    check_bulk_size(req.items)
+    result = await save_drafts_bulk([(item.topic, item.company, item.draft) for item in req.items])
+    return bulk_save_response(req.items, result)
+
+@router.post("/load-draft/bulk")
+async def load_drafts_bulk_api(req: BulkLoadRequest):
+    check_bulk_size(req.items)
+    found = await load_drafts_bulk([(item.topic, item.company) for item in req.items])
+    return {"items": [
+        {
+            "topic": item.topic,
+            "company": item.company,
+            "found": (item.topic, item.company) in found,
+            "draft": found.get((item.topic, item.company)) or "",
+        }
+        for item in req.items
+    ]}
+
 @router.get("/indicator-status", response_model=Dict[str, str])
-def get_indicator_status():
-    raw = list(draft_collection.find(
-        {}, {"_id": 0, "topic": 1, "status": 1, "draft": 1}
-    ))
-    result = {}
-
-    for doc in raw:
-        code = doc["topic"]
-        if doc.get("status") == "completed":
-            result[code] = "completed"
-        elif doc.get("status") == "saved":
-            result[code] = "saved"
-        elif doc.get("draft"):
-            result[code] = "saved"
-        else:
-            # ✅ 추가: draft_inputs 확인
-            input_doc = input_collection.find_one({"topic": code})
-            if input_doc and (
-                input_doc.get("inputs") or input_doc.get("table") or input_doc.get("improvement")
-            ):
-                result[code] = "saved"  # ✅ 입력값만 있어도 저장됨 처리
-            else:
-                result[code] = "empty"
-
-    return result
+async def get_indicator_status(company: str):
+    # ✅ 초안 + 입력값($lookup) 상태를 aggregation 1회로 계산 (해당 회사 문서만)
+    return await indicator_statuses(company)
 
 
 @router.post("/complete-indicator/{code}")
-def complete_indicator(code: str):
+async def complete_indicator(code: str, company: str):
     try:
-        result = draft_collection.update_one(
-            {"topic": code},
-            {"$set": {"status": "completed"}},
-            upsert=True
-        )
-        if not result.acknowledged:
+        acknowledged = await mark_indicator_completed(code, company)
+        if not acknowledged:
             raise RuntimeError("완료 처리 실패")
         return {"success": True}
     except Exception as e:
@@ -719,16 +728,14 @@ def complete_indicator(code: str):
 
 # ⬇️ 초안 불러오기 API
 @router.get("/load-draft")
-def load_draft_api(topic: str, company: str):
-    draft = load_draft(topic, company)
+async def load_draft_api(topic: str, company: str):
+    draft = await load_draft(topic, company)
     return {"draft": draft or ""}
 
 
 @router.delete("/delete-draft")
 async def delete_draft_api(req: DeleteDraftRequest):
-    # services/draft_store.py 에 delete 함수가 없으면 바로 pymongo 코드로 구현
-    from services.draft_store import delete_draft  # 혹은 직접 MongoDB delete 로직
-    deleted = delete_draft(req.topic, req.company)
+    deleted = await delete_draft(req.topic, req.company)
     if not deleted:
         raise HTTPException(status_code=404, detail="Draft not found")
     return {"deleted": True}
\ No newline at end of file
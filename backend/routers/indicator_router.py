@@ -1,20 +1,14 @@
 from fastapi import APIRouter
-import pandas as pd
-import os
-from services.vector_loader import load_vectorstore
+from services.sasb_mapping import get_sasb_mapping
+from services.sasb_blocks import get_sasb_block_index
+from services.warmup import register_warmup
 
 router = APIRouter()
 
-# 파일 경로 설정
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-industry_map_path = os.path.join(BASE_DIR, "../SASB/sasb_industries_map.xlsx")
-kbz_map_path = os.path.join(BASE_DIR, "../SASB/kbz_sasb_eng_topics_map.xlsx")
-
-industry_df = pd.read_excel(industry_map_path)
-kbz_df = pd.read_excel(kbz_map_path)
-
-industry_df.columns = industry_df.columns.str.strip()
-kbz_df.columns = kbz_df.columns.str.strip()
+# ✅ 업종/KBZ 매핑은 services.sasb_mapping 인덱스에서 조회 (엑셀은 변경 시에만 다시 컴파일)
+#   SASB 기능은 선택 기능 → 엑셀/표 데이터가 없어도 /ready 는 막지 않음
+register_warmup("sasb_mapping", get_sasb_mapping, required=False)
+register_warmup("sasb_block_index", get_sasb_block_index, required=False)
 
 group_map = {
     "제품 안전": "제품 안전", "제품안전": "제품 안전", "제품 품질 및 안전": "제품 안전",
@@ -40,65 +34,25 @@ group_map = {
 
 @router.get("/recommend-by-name/{industry_name}")
 def recommend_by_name(industry_name: str):
+    sasb_mapping = get_sasb_mapping()
+
     # 1. 업종명으로 기준명 추출
-    filtered = industry_df[industry_df["산업명"] == industry_name]
-    if filtered.empty:
+    required_criteria = sasb_mapping.criteria_for(industry_name)
+    if required_criteria is None:
         return {"error": f"'{industry_name}' 업종을 찾을 수 없습니다."}
 
-    criteria_raw = filtered["Disclosure_Topic"].dropna().unique().tolist()
-    required_criteria = list({x.strip() for item in criteria_raw for x in str(item).split(",")})
-
-    # 2. KBZ 매핑
-    mapped, matched_criteria = [], set()
-    for _, row in kbz_df.iterrows():
-        kbz_code = row["KBZ_Code"]
-        topic = str(row["Mapped_SASB_Topic"]).strip()
-        if topic in required_criteria:
-            mapped.append({
-                "kbz_code": kbz_code,
-                "matched_criteria": topic
-            })
-            matched_criteria.add(topic)
+    # 2. KBZ 매핑 (매핑 엑셀 행 순서)
+    mapped, matched_criteria = sasb_mapping.map_criteria(required_criteria)
 
     # 3. unmapped 처리
-    unmapped_criteria = list(set(required_criteria) - matched_criteria)
-
-    sasb_vectorstore = load_vectorstore("sasb")
-    all_docs = list(sasb_vectorstore.docstore._dict.values())
-    sorted_docs = sorted(all_docs, key=lambda d: d.metadata.get("chunk_id", ""))
-
-    # 블록 추출 함수: 기준명 등장 후 다른 기준명 나오기 전까지
-    def extract_block_for_crit(crit: str):
-        block = []
-        seen_chunk_ids = set()
-        found = False
-        for doc in sorted_docs:
-            content = doc.page_content
-            chunk_id = doc.metadata.get("chunk_id")
-
-            if not found and crit in content:
-                found = True
-                if chunk_id not in seen_chunk_ids:
-                    block.append(doc)
-                    seen_chunk_ids.add(chunk_id)
-                continue
-
-            if found:
-                if any(other != crit and other in content for other in unmapped_criteria):
-                    break
-                if chunk_id not in seen_chunk_ids:
-                    block.append(doc)
-                    seen_chunk_ids.add(chunk_id)
-        return [doc.page_content for doc in block]
-
-    unmapped = []
-    for crit in unmapped_criteria:
-        crit = crit.strip()
-        chunks = extract_block_for_crit(crit)
-        unmapped.append({
-            "criteria": crit,
-            "chunks": chunks
-        })
+    unmapped_criteria = [crit for crit in required_criteria if crit not in matched_criteria]
+
+    # 기준명 블록: 기준명 첫 등장 후 다른 unmapped 기준명이 나오기 전까지 (사전 계산된 인덱스)
+    block_index = get_sasb_block_index()
+    unmapped = [
+        {"criteria": crit, "chunks": block_index.block(crit, unmapped_criteria)}
+        for crit in unmapped_criteria
+    ]
 
     # 4. 그룹핑
     def group_key(name):
@@ -1,13 +1,15 @@
 from fastapi import APIRouter, Request
 from pydantic import BaseModel
 from typing import List, Optional
-from bs4 import BeautifulSoup
 from pathlib import Path
 import pandas as pd
 import json
 import re
 import os
 from services.draft_store import save_draft, load_draft
+from services.table_assets import get_table_asset
+from services.asset_manifest import tables_for_page
+from services.asset_paths import SASB_TABLE_DIR
 from langchain_community.chat_models import ChatOpenAI
 from langchain.schema import SystemMessage, HumanMessage
 
@@ -15,7 +17,7 @@ router = APIRouter()
 print("✅ sasb_router loaded")
 
 CHUNK_PATH = Path(__file__).resolve().parent.parent / "SASB/sasb_chunks.xlsx"
-TABLE_DIR = Path(__file__).resolve().parent.parent / "SASB/sasb_tables"
+TABLE_DIR = SASB_TABLE_DIR
 
 chunk_df = pd.read_excel(CHUNK_PATH)
 chunk_df.columns = chunk_df.columns.str.strip()
@@ -34,13 +36,12 @@ def fetch_data(req: FetchDataRequest):
 
     table_htmls, table_texts, table_paths = [], [], []
     for page in sorted(pages):
-        for path in TABLE_DIR.glob(f"page{page}_table*.html"):
+        for path in tables_for_page(TABLE_DIR, page):
             try:
-                soup = BeautifulSoup(path.read_text(encoding="utf-8"), "html.parser")
-                table = soup.find("table")
-                if table:
-                    table_htmls.append(str(table))
-                    table_texts.append(soup.get_text(separator="\n", strip=True))
+                asset = get_table_asset(path)
+                if asset and asset.has_table:
+                    table_htmls.append(asset.table_html)
+                    table_texts.append(asset.text)
                     table_paths.append(str(path))
             except Exception as e:
                 print(f"❌ 표 파싱 실패: {path} → {e}")
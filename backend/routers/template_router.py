@@ -1,8 +1,10 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from services.vector_loader import load_vectorstore
+from services.document_index import get_document_index
+from services.table_assets import get_table_asset
+from services import pdf_renderer, data_access
+from services.marker_placement import place_markers
 from pathlib import Path
-from bs4 import BeautifulSoup
 from langchain.chat_models import ChatOpenAI
 from langchain.schema import SystemMessage, HumanMessage
 import re
@@ -10,17 +12,18 @@ from dotenv import load_dotenv
 import os
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.chat_models import ChatOpenAI
-from difflib import SequenceMatcher
-from fastapi.responses import FileResponse
-from weasyprint import HTML
-from jinja2 import Environment, FileSystemLoader
+from fastapi.responses import FileResponse, StreamingResponse
 from datetime import datetime
 from pathlib import Path
-import uuid
+import json
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import OrderedDict
+import threading
 from typing import List, Optional
 import requests
 from .models.draft_model import Draft
-from pymongo import MongoClient
 import os
 
 
@@ -29,10 +32,6 @@ load_dotenv()
 router = APIRouter()
 print("✅ template_router loaded")
 
-client = MongoClient(os.getenv("MONGO_URI"))
-db = client["esg_templates_db"]
-drafts = db["drafts"]
-
 def call_hyperclova_llm(system_msg: SystemMessage, human_msg: HumanMessage) -> str:
     prompt = f"{system_msg.content.strip()}\n\n{human_msg.content.strip()}"
 
@@ -63,6 +62,10 @@ class TemplateRequest(BaseModel):
     topic: str
     department: Optional[str] = ""
     history: Optional[List[HistoryItem]] = []
+    # /generate-pdf 전용: 본문 HTML을 직접 넘기거나, 저장본이 없을 때 재생성 허용
+    html: Optional[str] = None
+    user_id: Optional[str] = None
+    regenerate: Optional[bool] = False
 
 class HtmlToPdfRequest(BaseModel):
     topic: str
@@ -71,23 +74,48 @@ class HtmlToPdfRequest(BaseModel):
     html: str
     history: List[HistoryItem]
 
-@router.post("/generate")
-def generate_template(req: TemplateRequest):
-    from difflib import SequenceMatcher
-
-    vectorstore = load_vectorstore("esg_templates")
-
-    # ✅ 청크 필터링 및 정렬
-    all_docs = list(vectorstore.docstore._dict.values())
-    filtered = [d for d in all_docs if d.metadata.get("title") == req.topic]
+# ✅ 그룹 병렬 처리 설정
+CHUNKS_PER_REQUEST = 10
+GROUP_MAX_CONCURRENCY = int(os.getenv("TEMPLATE_GROUP_CONCURRENCY", "4"))
+GROUP_TIMEOUT = float(os.getenv("TEMPLATE_GROUP_TIMEOUT", "90"))
+GROUP_ATTEMPTS = int(os.getenv("TEMPLATE_GROUP_ATTEMPTS", "2"))
+GROUP_FAILED_TEXT = "⚠️ GPT 응답 실패 (일부)"
+
+# ✅ 최근 생성 결과 캐시 (company, topic) → (만료 시각, template)
+#   PDF 내보내기에서 방금 생성한 규정안을 다시 GPT로 만들지 않도록
+GENERATION_TTL = float(os.getenv("TEMPLATE_GENERATION_TTL", "1800"))
+GENERATION_MAX_ENTRIES = 256
+_generations = OrderedDict()
+_generations_lock = threading.Lock()
+
+
+def remember_generation(company: str, topic: str, template: str):
+    with _generations_lock:
+        _generations[(company, topic)] = (time.time() + GENERATION_TTL, template)
+        _generations.move_to_end((company, topic))
+        while len(_generations) > GENERATION_MAX_ENTRIES:
+            _generations.popitem(last=False)
+
+
+def recent_generation(company: str, topic: str) -> str | None:
+    with _generations_lock:
+        entry = _generations.get((company, topic))
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            del _generations[(company, topic)]
+            return None
+        return entry[1]
+
+
+def load_template_sources(topic: str):
+    # ✅ 청크 조회 (문서 인덱스, chunk_id 정렬 상태)
+    filtered = get_document_index("esg_templates").with_title(topic)
     if not filtered:
-        return {"template": "❌ 해당 주제에 대한 규정안이 없습니다."}
-    filtered = sorted(filtered, key=lambda d: d.metadata.get("chunk_id", ""))
+        return None
 
     # ✅ 표 로딩
     table_paths, table_htmls, table_texts, seen = [], [], [], set()
-    max_table_count = len(table_htmls)
-    print(f"맥스테이블:{max_table_count}")
     for doc in filtered:
         t_raw = doc.metadata.get("tables", [])
         t_list = eval(t_raw) if isinstance(t_raw, str) else t_raw
@@ -96,24 +124,27 @@ def generate_template(req: TemplateRequest):
                 seen.add(path)
                 table_paths.append(path)
                 try:
-                    soup = BeautifulSoup(Path(path).read_text(encoding="utf-8"), "html.parser")
-                    h3 = soup.find("h3")
-                    table = soup.find("table")
-                    if table:
-                        combined = str(h3) + "\n" if h3 else ""
-                        combined += str(table)
-                        table_htmls.append(combined)
-                        table_texts.append(soup.get_text(separator="\n", strip=True))
+                    asset = get_table_asset(path)
+                    if asset is None:
+                        raise FileNotFoundError(path)
+                    if asset.has_table:
+                        table_htmls.append(asset.combined_html)
+                        table_texts.append(asset.text)
                 except Exception as e:
                     print(f"❌ 표 읽기 실패: {path} → {e}")
 
+    return {
+        "filtered": filtered,
+        "table_paths": table_paths,
+        "table_htmls": table_htmls,
+        "table_texts": table_texts,
+    }
+
+
+def build_group_messages(filtered, company: str):
     # ✅ LLM 준비 (GPT는 마커/표 출력 금지)
-    llm = ChatOpenAI(
-        model="gpt-4o",
-        temperature=0.2,
-        max_tokens=2048,
-        openai_api_key=os.getenv("OPENAI_API_KEY")
-    )
+    max_table_count = 0  # 마커는 백엔드(assemble_template)에서만 삽입
+    print(f"맥스테이블:{max_table_count}")
     system_msg = SystemMessage(content=f"""\
 너는 ESG 규정안 문서를 정돈하는 도우미야.
 
@@ -130,15 +161,13 @@ def generate_template(req: TemplateRequest):
 """)
 
     # ✅ 청크 그룹 나누기
-    CHUNKS_PER_REQUEST = 10
     chunk_groups = [
         filtered[i:i + CHUNKS_PER_REQUEST]
         for i in range(0, len(filtered), CHUNKS_PER_REQUEST)
     ]
     print(f"📚 {len(chunk_groups)}개 그룹으로 분할됨 (그룹당 최대 {CHUNKS_PER_REQUEST}개)")
 
-    # ✅ 그룹별 GPT 호출
-    results = []
+    messages = []
     for group_idx, group in enumerate(chunk_groups):
         chunk_ids = [d.metadata.get("chunk_id", "?") for d in group]
         print(f"🔹 그룹 {group_idx+1}: chunk_ids = {chunk_ids}")
@@ -147,11 +176,11 @@ def generate_template(req: TemplateRequest):
         print(f"📄 그룹 {group_idx+1} 텍스트 시작:\n{group_text[:300]}...\n")
 
         group_text = (
-            group_text.replace("[기업명]", req.company)
-                      .replace("{회사명}", req.company)
-                      .replace("기업명 은", f"{req.company}은")
-                      .replace("㈜△△△사", req.company)
-                      .replace("기업명", req.company)
+            group_text.replace("[기업명]", company)
+                      .replace("{회사명}", company)
+                      .replace("기업명 은", f"{company}은")
+                      .replace("㈜△△△사", company)
+                      .replace("기업명", company)
         )
         group_text = re.sub(r"\n{2,}", "\n\n", group_text)
 
@@ -159,14 +188,47 @@ def generate_template(req: TemplateRequest):
 📄 규정안 원문:
 {group_text}
 """)
+        messages.append([system_msg, human_msg])
+    return messages
+
+
+def call_group(llm, messages, group_idx: int) -> str:
+    # ✅ 그룹별 재시도 (타임아웃은 llm request_timeout)
+    for attempt in range(1, GROUP_ATTEMPTS + 1):
         try:
-            response = llm.invoke([system_msg, human_msg])
+            response = llm.invoke(messages)
             print(f"📤 그룹 {group_idx+1} 응답 길이: {len(response.content)}")
-            results.append(response.content)
+            return response.content
         except Exception as e:
-            print(f"❌ GPT 그룹 {group_idx+1} 호출 실패:", e)
-            results.append("⚠️ GPT 응답 실패 (일부)")
+            print(f"❌ GPT 그룹 {group_idx+1} 호출 실패 ({attempt}/{GROUP_ATTEMPTS}):", e)
+            if attempt < GROUP_ATTEMPTS:
+                time.sleep(min(2 ** (attempt - 1), 8))
+    return GROUP_FAILED_TEXT
+
+
+def run_groups(group_messages):
+    """그룹별 GPT 호출을 동시에 실행하고, 끝나는 순서대로 (group_idx, 응답) 반환"""
+    if not group_messages:
+        return
+    llm = ChatOpenAI(
+        model="gpt-4o",
+        temperature=0.2,
+        max_tokens=2048,
+        request_timeout=GROUP_TIMEOUT,
+        max_retries=0,
+        openai_api_key=os.getenv("OPENAI_API_KEY")
+    )
+    workers = max(1, min(GROUP_MAX_CONCURRENCY, len(group_messages)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(call_group, llm, messages, idx): idx
+            for idx, messages in enumerate(group_messages)
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
 
+
+def assemble_template(results: list[str], table_htmls: list[str], table_texts: list[str]) -> str:
     # ✅ GPT가 실수로 table을 넣었을 경우 제거
     cleaned_results = []
     for r in results:
@@ -176,36 +238,8 @@ def generate_template(req: TemplateRequest):
 
     output_text = "\n\n".join(cleaned_results)
 
-    # ✅ 마커 삽입 함수
-    def insert_marker_safely(text, marker, table_text):
-        if marker in text:
-            print(f"⚠️ 마커 {marker} 이미 존재 → 삽입 생략")
-            return text
-
-        paragraphs = text.split("\n\n")
-        best_score, best_idx = 0, -1
-        for i, para in enumerate(paragraphs):
-            score = SequenceMatcher(None, para, table_text).ratio()
-            if score > best_score:
-                best_score, best_idx = score, i
-
-        if best_score > 0.5:
-            print(f"✅ 유사도 {best_score:.2f} → 마커 {marker} 삽입 (문단 {best_idx})")
-            paragraphs[best_idx] += f"\n\n{marker}"
-        else:
-            print(f"⚠️ 유사 문단 없음 → 마커 {marker} 본문 끝에 삽입")
-            paragraphs.append(marker)
-
-        return "\n\n".join(paragraphs)
-
-    # ✅ 마커 삽입 (백엔드 전담)
-    for i, table_text in enumerate(table_texts):
-        marker = f"[[TABLE_{i+1}]]"
-        if marker not in output_text:
-            print(f"❌ 마커 {marker} 없음 → 삽입 시도")
-            output_text = insert_marker_safely(output_text, marker, table_text)
-        else:
-            print(f"✅ 마커 {marker} 이미 존재 → 삽입 생략")
+    # ✅ 마커 삽입 (백엔드 전담, 문단 TF-IDF 유사도)
+    output_text = place_markers(output_text, table_texts)
 
     # ✅ 마커를 실제 table로 치환
     for i, html in enumerate(table_htmls):
@@ -216,105 +250,210 @@ def generate_template(req: TemplateRequest):
         else:
             print(f"⚠️ 마커 {marker} 없음 → <table> 삽입 생략")
 
+    return output_text
+
+
+@router.post("/generate")
+def generate_template(req: TemplateRequest):
+    sources = load_template_sources(req.topic)
+    if sources is None:
+        return {"template": "❌ 해당 주제에 대한 규정안이 없습니다."}
+
+    # ✅ 그룹별 GPT 호출 (동시 실행, 순서대로 재조립)
+    group_messages = build_group_messages(sources["filtered"], req.company)
+    results = [GROUP_FAILED_TEXT] * len(group_messages)
+    for group_idx, content in run_groups(group_messages):
+        results[group_idx] = content
+
+    output_text = assemble_template(results, sources["table_htmls"], sources["table_texts"])
+    remember_generation(req.company, req.topic, output_text)
     return {
         "template": output_text,
         "topic": req.topic,
         "company": req.company,
         "department": req.department,
         "history": req.history,
-        "chunk_count": len(filtered),
+        "chunk_count": len(sources["filtered"]),
         "table_html": "",
-        "table_paths": table_paths,
+        "table_paths": sources["table_paths"],
     }
 
+
+@router.post("/generate-stream")
+def generate_template_stream(req: TemplateRequest):
+    # ✅ NDJSON: 끝난 그룹부터 {"type": "group"} 프레임 → 마지막에 {"type": "template"}
+    def frames():
+        sources = load_template_sources(req.topic)
+        if sources is None:
+            yield json.dumps({"type": "template", "template": "❌ 해당 주제에 대한 규정안이 없습니다."}, ensure_ascii=False) + "\n"
+            return
+
+        group_messages = build_group_messages(sources["filtered"], req.company)
+        results = [GROUP_FAILED_TEXT] * len(group_messages)
+        for group_idx, content in run_groups(group_messages):
+            results[group_idx] = content
+            yield json.dumps({
+                "type": "group",
+                "index": group_idx,
+                "total": len(group_messages),
+                "content": content,
+            }, ensure_ascii=False) + "\n"
+
+        output_text = assemble_template(results, sources["table_htmls"], sources["table_texts"])
+        remember_generation(req.company, req.topic, output_text)
+        yield json.dumps({
+            "type": "template",
+            "template": output_text,
+            "topic": req.topic,
+            "company": req.company,
+            "department": req.department,
+            "history": [h.dict() for h in req.history or []],
+            "chunk_count": len(sources["filtered"]),
+            "table_html": "",
+            "table_paths": sources["table_paths"],
+        }, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(frames(), media_type="application/x-ndjson")
+
+def pdf_filename(company: str, topic: str) -> str:
+    return f"{company}_{topic}.pdf"
+
+
+def pdf_file_response(path: Path, filename: str) -> FileResponse:
+    return FileResponse(path=str(path), filename=filename, media_type="application/pdf")
+
+
+async def resolve_template_html(req: TemplateRequest) -> tuple[str | None, str]:
+    """PDF 본문 결정 순서: 요청 html → 저장된 초안(user_id가 있을 때만) → 최근 생성 캐시 → (regenerate=True일 때만) 재생성"""
+    if req.html:
+        return req.html, "request"
+
+    html = None
+    if req.user_id:
+        try:
+            html = await data_access.latest_template_draft_html(req.company, req.topic, req.user_id)
+        except Exception as e:
+            print(f"❌ 초안 조회 실패: {e}")
+    if html:
+        return html, "draft"
+
+    html = recent_generation(req.company, req.topic)
+    if html:
+        return html, "generation_cache"
+
+    if req.regenerate:
+        result = await asyncio.to_thread(generate_template, req)
+        if result.get("topic"):
+            return result["template"], "regenerated"
+    return None, "missing"
+
+
 @router.post("/generate-pdf")
-def generate_template_pdf(req: TemplateRequest):  # 이미 존재할 경우 생략 가능
-    result = generate_template(req)
-    html_content = result["template"]
-
-    # 템플릿 렌더링
-    env = Environment(loader=FileSystemLoader("templates"))
-    template = env.get_template("esg_template.html")
-    rendered_html = template.render(
+async def generate_template_pdf(req: TemplateRequest):
+    html_content, source = await resolve_template_html(req)
+    if html_content is None:
+        raise HTTPException(
+            status_code=404,
+            detail="저장된 규정안이 없습니다. html을 전달하거나 regenerate=true로 요청하세요."
+        )
+    print(f"📄 PDF 본문 출처: {source} ({req.company}/{req.topic})")
+
+    # 템플릿 렌더링 (컴파일된 템플릿 재사용)
+    rendered_html = pdf_renderer.render_template_html(
         topic=req.topic,
         company=req.company,
         department=req.department,
-        date=datetime.now().strftime("%Y.%m.%d"),
-        content=req.html,
+        date=pdf_renderer.today_str(),
+        content=html_content,
         history=req.history
     )
 
-    # PDF 저장 경로 설정
-    output_dir = Path("static/pdf")
-    output_dir.mkdir(parents=True, exist_ok=True)
-    file_name = f"{uuid.uuid4()}.pdf"
-    pdf_path = output_dir / file_name
-
-    # PDF 생성
-    HTML(string=rendered_html).write_pdf(str(pdf_path))
+    # PDF 생성 (프로세스 풀, 같은 내용이면 기존 파일 재사용)
+    filename = pdf_filename(req.company, req.topic)
+    try:
+        pdf_path = await pdf_renderer.render_pdf_async(rendered_html, filename)
+    except Exception as e:
+        print(f"❌ PDF 생성 실패: {e}")
+        raise HTTPException(status_code=500, detail="PDF 생성 실패")
 
     # 사용자에게 파일 다운로드로 응답
-    return FileResponse(
-        path=str(pdf_path),
-        filename=f"{req.company}_{req.topic}.pdf",
-        media_type="application/pdf"
-    )
+    return pdf_file_response(pdf_path, filename)
 
 @router.post("/download-pdf-from-html")
-def download_pdf_from_html(req: HtmlToPdfRequest):
-    env = Environment(loader=FileSystemLoader("templates"))
-    template = env.get_template("esg_template.html")
-    rendered_html = template.render(
+async def download_pdf_from_html(req: HtmlToPdfRequest):
+    rendered_html = pdf_renderer.render_template_html(
         topic=req.topic,
         company=req.company,
-        department=req.department,  
-        history=req.history,       
+        department=req.department,
+        history=req.history,
         content=req.html
     )
 
+    filename = pdf_filename(req.company, req.topic)
+    try:
+        pdf_path = await pdf_renderer.render_pdf_async(rendered_html, filename)
+    except Exception as e:
+        print(f"❌ PDF 생성 실패: {e}")
+        raise HTTPException(status_code=500, detail="PDF 생성 실패")
 
-    output_dir = Path("static/pdf")
-    output_dir.mkdir(parents=True, exist_ok=True)
-    file_name = f"{uuid.uuid4()}.pdf"
-    pdf_path = output_dir / file_name
-    HTML(string=rendered_html).write_pdf(str(pdf_path))
+    return pdf_file_response(pdf_path, filename)
 
-    return FileResponse(
-        path=str(pdf_path),
-        filename=f"{req.company}_{req.topic}.pdf",
-        media_type="application/pdf"
+# ✅ PDF 작업 API: 제출 → 상태 조회 → 다운로드
+@router.post("/pdf-jobs")
+def submit_pdf_job(req: HtmlToPdfRequest):
+    rendered_html = pdf_renderer.render_template_html(
+        topic=req.topic,
+        company=req.company,
+        department=req.department,
+        history=req.history,
+        content=req.html
     )
+    job_id = pdf_renderer.submit_pdf(rendered_html, pdf_filename(req.company, req.topic))
+    return pdf_renderer.job_status(job_id)
+
+@router.get("/pdf-jobs/{job_id}")
+def get_pdf_job(job_id: str):
+    status = pdf_renderer.job_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="해당 PDF 작업 없음")
+    return status
+
+@router.get("/pdf-jobs/{job_id}/download")
+def download_pdf_job(job_id: str):
+    status = pdf_renderer.job_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="해당 PDF 작업 없음")
+    if status["status"] == "pending":
+        raise HTTPException(status_code=409, detail="PDF 생성 중")
+    path = pdf_renderer.job_result_path(job_id)
+    if path is None:
+        raise HTTPException(status_code=500, detail=status.get("error") or "PDF 생성 실패")
+    return pdf_file_response(path, status["filename"])
 
 @router.get("/list-drafts")
-def list_drafts(user_id: str):
-    items = drafts.find({"user_id": user_id}, {"_id": 0, "company": 1, "topic": 1, "timestamp": 1, "department": 1})
-    return list(items)
+async def list_drafts(user_id: str):
+    return await data_access.list_template_drafts(user_id)
 
 @router.post("/save-draft")
-def save_draft(draft: Draft):
+async def save_draft(draft: Draft):
     draft_dict = draft.dict()
     draft_dict["timestamp"] = datetime.utcnow()
     if "is_final" not in draft_dict:
         draft_dict["is_final"] = False
 
-    drafts.update_one(
-        {"user_id": draft.user_id, "topic": draft.topic},
-        {"$set": draft_dict},
-        upsert=True
-    )
+    await data_access.save_template_draft(draft_dict)
     return {"message": "✅ 초안 저장 완료"}
 
 @router.get("/load-draft")
-def load_draft(user_id: str, topic: str):
+async def load_draft(user_id: str, topic: str):
     print(f"📥 load-draft 요청: user_id={user_id}, topic={topic}")
-    draft = drafts.find_one({"user_id": user_id, "topic": topic}, {"_id": 0})
+    draft = await data_access.get_template_draft(user_id, topic)
     if draft:
         return draft
     return {"message": "❌ 해당 초안 없음"}
 
 @router.delete("/delete-draft")
-def delete_draft(user_id: str, topic: str):
-    result = drafts.delete_one({"user_id": user_id, "topic": topic})
-    if result.deleted_count == 1:
+async def delete_draft(user_id: str, topic: str):
+    if await data_access.delete_template_draft(user_id, topic):
         return {"message": "✅ 초안 삭제 완료"}
-    return {"message": "❌ 해당 초안 없음"}
\ No newline at end of file
+    return {"message": "❌ 해당 초안 없음"}
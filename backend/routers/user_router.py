@@ -1,28 +1,21 @@
 # routers/user_router.py
 
 from fastapi import APIRouter, Depends, HTTPException
-from bson import ObjectId
-from services.database import users_collection
-from services.jwt_utils import get_current_user
+from services.data_access import update_user
+from services.jwt_utils import get_current_user, get_current_user_record, invalidate_user
 from routers.models.survey_schema import SurveyData
 
 router = APIRouter()
 
 @router.post("/survey")
-def save_survey(data: SurveyData, user=Depends(get_current_user)):
-    result = users_collection.update_one(
-        {"_id": ObjectId(user["id"])},
-        {"$set": data.dict()}
-    )
-    if result.matched_count == 0:
+async def save_survey(data: SurveyData, user=Depends(get_current_user)):
+    if not await update_user(user["id"], data.dict()):
         raise HTTPException(status_code=404, detail="사용자 정보 없음")
+    invalidate_user(user["id"])
     return {"message": "설문 저장 완료"}
 
 @router.get("/profile")
-def get_profile(user=Depends(get_current_user)):
-    doc = users_collection.find_one({"_id": ObjectId(user["id"])})
-    if not doc:
-        raise HTTPException(status_code=404, detail="사용자 없음")
+async def get_profile(doc=Depends(get_current_user_record)):
     return {
         "industry_ko": doc.get("industry_ko"),
         "industry_code": doc.get("industry_code"),
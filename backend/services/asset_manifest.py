@@ -0,0 +1,157 @@
+from pathlib import Path
+import argparse
+import json
+import os
+import re
+import threading
+import time
+
+# ✅ (디렉토리, 페이지) → 표/이미지 파일 목록 매니페스트
+#   - 인제스트 시 디렉토리마다 매니페스트 생성, 서버 시작 시 로딩
+#   - 요청마다 glob 대신 dict 조회. 디렉토리 mtime이 바뀌면(새 파일 추가 등) 다시 스캔
+#   - 매니페스트는 디렉토리 "옆"에 저장 (안에 쓰면 디렉토리 mtime이 바뀌어 버림)
+CHECK_INTERVAL = float(os.getenv("ASSET_MANIFEST_CHECK_INTERVAL", "2"))
+
+PATTERNS = {
+    "tables": re.compile(r"^page(\d+)_table.*\.html$"),
+    "images": re.compile(r"page(\d+)(?!\d)"),
+}
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg"}
+
+
+def scan_directory(asset_dir: Path, kind: str) -> dict[int, list[str]]:
+    pattern = PATTERNS[kind]
+    pages = {}
+    for entry in os.scandir(asset_dir):
+        if not entry.is_file():
+            continue
+        if kind == "images" and Path(entry.name).suffix.lower() not in IMAGE_SUFFIXES:
+            continue
+        match = pattern.search(entry.name)
+        if match:
+            pages.setdefault(int(match.group(1)), []).append(entry.name)
+    return {page: sorted(names) for page, names in pages.items()}
+
+
+def manifest_path(asset_dir: Path) -> Path:
+    # 예: extracted/esg_Manual/tables_gpt → extracted/esg_Manual/.tables_gpt.manifest.json
+    return asset_dir.parent / f".{asset_dir.name}.manifest.json"
+
+
+def write_manifest(asset_dir: Path, kind: str, pages: dict, dir_mtime_ns: int):
+    data = {
+        "kind": kind,
+        "dir_mtime_ns": dir_mtime_ns,
+        "pages": {str(page): names for page, names in sorted(pages.items())},
+    }
+    path = manifest_path(asset_dir)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"⚠️ 매니페스트 저장 실패: {asset_dir} → {e}")
+
+
+def build_manifest(asset_dir, kind: str) -> dict:
+    asset_dir = Path(asset_dir)
+    # 스캔 전에 mtime을 읽어야 스캔 도중 추가된 파일도 다음 refresh에서 잡힘
+    dir_mtime_ns = asset_dir.stat().st_mtime_ns
+    pages = scan_directory(asset_dir, kind)
+    write_manifest(asset_dir, kind, pages, dir_mtime_ns)
+    print(f"🗂️ 매니페스트 생성: {asset_dir} ({kind}, {len(pages)}개 페이지)")
+    return pages
+
+
+class AssetManifest:
+    def __init__(self, asset_dir: Path, kind: str):
+        self.asset_dir = asset_dir
+        self.kind = kind
+        self.pages = {}
+        self.dir_mtime_ns = None
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _load_from_disk(self, dir_mtime_ns: int) -> bool:
+        path = manifest_path(self.asset_dir)
+        if not path.exists():
+            return False
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            print(f"⚠️ 매니페스트 로드 실패: {path} → {e}")
+            return False
+        if data.get("kind") != self.kind or data.get("dir_mtime_ns") != dir_mtime_ns:
+            return False
+        self.pages = {int(page): names for page, names in data["pages"].items()}
+        return True
+
+    def refresh(self, force: bool = False):
+        now = time.monotonic()
+        if not force and self.dir_mtime_ns is not None and now - self.checked_at < CHECK_INTERVAL:
+            return
+
+        with self._lock:
+            self.checked_at = now
+            if not self.asset_dir.exists():
+                self.pages, self.dir_mtime_ns = {}, None
+                return
+            dir_mtime_ns = self.asset_dir.stat().st_mtime_ns
+            if not force and dir_mtime_ns == self.dir_mtime_ns:
+                return
+            if force or not self._load_from_disk(dir_mtime_ns):
+                # 새 파일이 생겼거나 매니페스트가 없음 → 다시 스캔 후 저장
+                self.pages = build_manifest(self.asset_dir, self.kind)
+            self.dir_mtime_ns = dir_mtime_ns
+
+    def files_for_page(self, page: int) -> list[str]:
+        self.refresh()
+        return [str(self.asset_dir / name) for name in self.pages.get(int(page), [])]
+
+
+_manifests = {}
+_manifests_lock = threading.Lock()
+
+
+def get_manifest(asset_dir, kind: str) -> AssetManifest:
+    key = (str(Path(asset_dir).resolve()), kind)
+    manifest = _manifests.get(key)
+    if manifest is None:
+        with _manifests_lock:
+            manifest = _manifests.get(key)
+            if manifest is None:
+                manifest = AssetManifest(Path(key[0]), kind)
+                _manifests[key] = manifest
+    return manifest
+
+
+def tables_for_page(table_dir, page: int) -> list[str]:
+    return get_manifest(table_dir, "tables").files_for_page(page)
+
+
+def images_for_page(image_dir, page: int) -> list[str]:
+    return get_manifest(image_dir, "images").files_for_page(page)
+
+
+def preload_manifests(dirs: list[tuple]):
+    """서버 시작 시 [(디렉토리, kind), ...] 매니페스트 로딩"""
+    for asset_dir, kind in dirs:
+        try:
+            get_manifest(asset_dir, kind).refresh(force=False)
+        except Exception as e:
+            print(f"❌ 매니페스트 로딩 실패: {asset_dir} → {e}")
+
+
+if __name__ == "__main__":
+    # 인제스트 후 실행: python -m services.asset_manifest extracted/esg_Manual extracted/...
+    parser = argparse.ArgumentParser()
+    parser.add_argument("base_dirs", nargs="+", help="tables_gpt/tables/images 하위 폴더를 가진 문서 디렉토리 또는 표 디렉토리")
+    args = parser.parse_args()
+
+    for base in map(Path, args.base_dirs):
+        targets = [(base / "tables_gpt", "tables"), (base / "tables", "tables"), (base / "images", "images")]
+        found = [(d, kind) for d, kind in targets if d.is_dir()]
+        if not found and base.is_dir():
+            found = [(base, "tables")]
+        for asset_dir, kind in found:
+            build_manifest(asset_dir, kind)
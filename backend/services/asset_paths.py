@@ -0,0 +1,7 @@
+from pathlib import Path
+
+# ✅ 정적 자산 경로 (라우터를 import하지 않고도 쓸 수 있도록 의존성 없는 모듈로 분리)
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+MANUAL_TABLE_DIR = BACKEND_DIR / "extracted/2025_Sustainable_Management_Manual_split/tables"
+SASB_TABLE_DIR = BACKEND_DIR / "SASB/sasb_tables"
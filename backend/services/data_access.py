@@ -0,0 +1,346 @@
+from datetime import datetime
+import os
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+
+# ✅ MongoDB 공용 데이터 접근 계층 (Motor, async)
+#   - 프로세스당 클라이언트 1개 (풀 크기 / 타임아웃은 환경변수)
+#   - 초안 / 입력값 / 규정안 초안 / 사용자 컬렉션별 repository 함수
+#   - MONGO_BACKEND=memory 이면 mongomock_motor 인메모리 클라이언트 (로컬 테스트용)
+#   - 연결 문자열은 MONGO_URL (이전 이름 MONGO_URI 도 당분간 허용, ⚠️ deprecated)
+
+MONGO_URL = os.getenv("MONGO_URL")
+MONGO_BACKEND = os.getenv("MONGO_BACKEND", "motor").lower()
+MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+TIMEOUT_MS = int(os.getenv("MONGO_TIMEOUT_MS", "5000"))
+
+DRAFTS_DB = "project3"            # 지표 초안 / 입력값
+USERS_DB = "login"                # 회원정보
+TEMPLATES_DB = "esg_templates_db"  # 규정안 초안
+
+_client = None
+_sync_client = None
+
+
+def _client_options() -> dict:
+    return {
+        "maxPoolSize": MAX_POOL_SIZE,
+        "minPoolSize": MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": TIMEOUT_MS,
+        "connectTimeoutMS": TIMEOUT_MS,
+    }
+
+
+def _mongo_url() -> str:
+    if MONGO_URL:
+        return MONGO_URL
+    legacy_url = os.getenv("MONGO_URI")
+    if legacy_url:
+        print("⚠️ MONGO_URI 는 deprecated 입니다. MONGO_URL 로 이름을 바꿔주세요.")
+        return legacy_url
+    raise ValueError("❌ MONGO_URL 환경변수가 필요합니다. (로컬 테스트는 MONGO_BACKEND=memory)")
+
+
+def get_client():
+    global _client
+    if _client is None:
+        if MONGO_BACKEND == "memory":
+            from mongomock_motor import AsyncMongoMockClient
+            _client = AsyncMongoMockClient()
+            print("🧪 MongoDB 인메모리 클라이언트 사용 (MONGO_BACKEND=memory)")
+        else:
+            from motor.motor_asyncio import AsyncIOMotorClient
+            _client = AsyncIOMotorClient(_mongo_url(), **_client_options())
+    return _client
+
+
+def get_sync_database(name: str):
+    """스레드풀에서 도는 동기 코드용 (pymongo, 같은 설정). memory 백엔드에서는 mongomock"""
+    global _sync_client
+    if _sync_client is None:
+        if MONGO_BACKEND == "memory":
+            import mongomock
+            _sync_client = mongomock.MongoClient()
+        else:
+            from pymongo import MongoClient
+            _sync_client = MongoClient(_mongo_url(), **_client_options())
+    return _sync_client[name]
+
+
+def close_client():
+    global _client, _sync_client
+    if _client is not None:
+        _client.close()
+        _client = None
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
+
+
+def draft_collection():
+    return get_client()[DRAFTS_DB]["drafts"]
+
+
+def input_collection():
+    return get_client()[DRAFTS_DB]["draft_inputs"]
+
+
+def template_draft_collection():
+    return get_client()[TEMPLATES_DB]["drafts"]
+
+
+def user_collection():
+    return get_client()[USERS_DB]["users"]
+
+
+async def ensure_indexes():
+    await draft_collection().create_index([("topic", 1), ("company", 1)])
+    await input_collection().create_index([("topic", 1), ("company", 1)])
+    await template_draft_collection().create_index([("user_id", 1), ("topic", 1)])
+    await template_draft_collection().create_index([("company", 1), ("topic", 1), ("timestamp", -1)])
+    await user_collection().create_index([("email", 1)])
+    print("🗂️ MongoDB 인덱스 확인 완료")
+
+
+# ---------------------------------------------------------------------------
+# 지표 초안 (project3.drafts)
+# ---------------------------------------------------------------------------
+
+async def get_draft(topic: str, company: str) -> str | None:
+    doc = await draft_collection().find_one({"topic": topic, "company": company}, {"draft": 1})
+    return doc.get("draft") if doc else None
+
+
+async def save_draft(topic: str, company: str, draft: str):
+    await draft_collection().update_one(
+        {"topic": topic, "company": company},
+        {"$set": {"draft": draft, "updated_at": datetime.utcnow()}},
+        upsert=True,
+    )
+
+
+async def delete_draft(topic: str, company: str) -> bool:
+    result = await draft_collection().delete_one({"topic": topic, "company": company})
+    return result.deleted_count > 0
+
+
+async def complete_draft(topic: str, company: str) -> bool:
+    result = await draft_collection().update_one({"topic": topic, "company": company}, {"$set": {"status": "completed"}}, upsert=True)
+    return result.acknowledged
+
+
+# ---------------------------------------------------------------------------
+# 입력값 (project3.draft_inputs)
+# ---------------------------------------------------------------------------
+
+async def get_input_data(topic: str, company: str) -> dict:
+    doc = await input_collection().find_one({"topic": topic, "company": company}, {"data": 1})
+    return doc.get("data", {}) if doc else {}
+
+
+async def save_input_data(topic: str, company: str, data: dict):
+    await input_collection().update_one(
+        {"topic": topic, "company": company},
+        {"$set": {"data": data, "updated_at": datetime.utcnow()}},
+        upsert=True,
+    )
+
+
+def _has_value(field: str) -> dict:
+    # 파이썬 truthy 판정과 동일: 없음 / None / "" / {} / [] 는 False
+    return {"$eq": [{"$in": [
+        {"$ifNull": [field, None]},
+        {"$literal": [None, "", {}, [], False, 0]},
+    ]}, False]}
+
+
+def _any_input(array: str) -> dict:
+    # 같은 회사의 입력값 문서 중 하나라도 값이 있으면 True
+    return {"$in": [True, {"$map": {
+        "input": {"$filter": {"input": array, "cond": {"$eq": ["$$this.company", "$company"]}}},
+        "in": {"$or": [
+            _has_value("$$this.inputs"), _has_value("$$this.table"), _has_value("$$this.improvement"),
+            _has_value("$$this.data.inputs"), _has_value("$$this.data.table"), _has_value("$$this.data.improvement"),
+        ]},
+    }}]}
+
+
+async def indicator_statuses(company: str) -> dict:
+    """지표별 상태 (completed / saved / empty) 를 aggregation 1회로 계산"""
+    inputs_name = input_collection().name
+    pipeline = [
+        {"$match": {"company": company}},
+        {"$project": {
+            "_id": 0,
+            "topic": 1,
+            "company": 1,
+            "status": 1,
+            "has_draft": _has_value("$draft"),
+            "input_topic": {"$concat": [{"$ifNull": ["$topic", ""]}, "__input"]},
+        }},
+        # 입력값 문서: save-inputs 형식("{code}__input" + data.*) / 이전 형식(code + inputs/table/improvement)
+        {"$lookup": {"from": inputs_name, "localField": "input_topic",
+                     "foreignField": "topic", "as": "inputs"}},
+        {"$lookup": {"from": inputs_name, "localField": "topic",
+                     "foreignField": "topic", "as": "legacy_inputs"}},
+        {"$project": {
+            "topic": 1,
+            "status": {"$switch": {
+                "branches": [
+                    {"case": {"$eq": ["$status", "completed"]}, "then": "completed"},
+                    {"case": {"$eq": ["$status", "saved"]}, "then": "saved"},
+                    {"case": "$has_draft", "then": "saved"},
+                    {"case": {"$or": [_any_input("$inputs"), _any_input("$legacy_inputs")]}, "then": "saved"},
+                ],
+                "default": "empty",
+            }},
+        }},
+    ]
+    result = {}
+    async for doc in draft_collection().aggregate(pipeline):
+        if doc.get("topic"):
+            result[doc["topic"]] = doc["status"]
+    return result
+
+
+# ---------------------------------------------------------------------------
+# 일괄 저장 / 조회 (bulk_write + $in)
+# ---------------------------------------------------------------------------
+
+async def _bulk_upsert(collection, items: list[tuple[str, str, dict]]) -> dict:
+    """items: [(topic, company, $set 필드)] → {"saved": n, "errors": [{"index", "error"}]}"""
+    if not items:
+        return {"saved": 0, "errors": []}
+    now = datetime.utcnow()
+    ops = [
+        UpdateOne({"topic": topic, "company": company}, {"$set": {**fields, "updated_at": now}}, upsert=True)
+        for topic, company, fields in items
+    ]
+    try:
+        await collection.bulk_write(ops, ordered=False)
+        return {"saved": len(ops), "errors": []}
+    except BulkWriteError as e:
+        errors = [{"index": err["index"], "error": err.get("errmsg", "write error")}
+                  for err in e.details.get("writeErrors", [])]
+        return {"saved": len(ops) - len(errors), "errors": errors}
+
+
+async def _bulk_find(collection, pairs: list[tuple[str, str]], projection: dict) -> dict:
+    """(topic, company) 목록 → {(topic, company): 문서}. 회사별 topic $in 조건을 한 쿼리로"""
+    by_company = {}
+    for topic, company in pairs:
+        by_company.setdefault(company, set()).add(topic)
+    if not by_company:
+        return {}
+    clauses = [{"company": company, "topic": {"$in": sorted(topics)}} for company, topics in by_company.items()]
+    query = clauses[0] if len(clauses) == 1 else {"$or": clauses}
+    found = {}
+    async for doc in collection.find(query, {**projection, "topic": 1, "company": 1}):
+        found[(doc["topic"], doc["company"])] = doc
+    return found
+
+
+async def save_drafts_bulk(items: list[tuple[str, str, str]]) -> dict:
+    return await _bulk_upsert(draft_collection(), [(t, c, {"draft": d}) for t, c, d in items])
+
+
+async def get_drafts_bulk(pairs: list[tuple[str, str]]) -> dict:
+    docs = await _bulk_find(draft_collection(), pairs, {"draft": 1})
+    return {key: doc.get("draft") for key, doc in docs.items()}
+
+
+async def save_input_data_bulk(items: list[tuple[str, str, dict]]) -> dict:
+    return await _bulk_upsert(input_collection(), [(t, c, {"data": d}) for t, c, d in items])
+
+
+async def get_input_data_bulk(pairs: list[tuple[str, str]]) -> dict:
+    docs = await _bulk_find(input_collection(), pairs, {"data": 1})
+    return {key: doc.get("data", {}) for key, doc in docs.items()}
+
+
+# ---------------------------------------------------------------------------
+# 규정안 초안 (esg_templates_db.drafts)
+# ---------------------------------------------------------------------------
+
+async def list_template_drafts(user_id: str) -> list[dict]:
+    cursor = template_draft_collection().find(
+        {"user_id": user_id}, {"_id": 0, "company": 1, "topic": 1, "timestamp": 1, "department": 1}
+    )
+    return await cursor.to_list(length=None)
+
+
+async def save_template_draft(draft: dict):
+    await template_draft_collection().update_one(
+        {"user_id": draft["user_id"], "topic": draft["topic"]},
+        {"$set": draft},
+        upsert=True,
+    )
+
+
+async def get_template_draft(user_id: str, topic: str) -> dict | None:
+    return await template_draft_collection().find_one({"user_id": user_id, "topic": topic}, {"_id": 0})
+
+
+async def delete_template_draft(user_id: str, topic: str) -> bool:
+    result = await template_draft_collection().delete_one({"user_id": user_id, "topic": topic})
+    return result.deleted_count == 1
+
+
+async def latest_template_draft_html(company: str, topic: str, user_id: str) -> str | None:
+    """해당 사용자의 가장 최근 초안만 (다른 사용자의 초안이 노출되지 않도록 user_id 필수)"""
+    query = {"company": company, "topic": topic, "user_id": user_id}
+    cursor = template_draft_collection().find(query, {"_id": 0, "html": 1}).sort("timestamp", -1).limit(1)
+    docs = await cursor.to_list(length=1)
+    return docs[0].get("html") if docs else None
+
+
+# ---------------------------------------------------------------------------
+# 사용자 (login.users)
+# ---------------------------------------------------------------------------
+
+def _object_id(user_id: str) -> ObjectId | None:
+    try:
+        return ObjectId(user_id)
+    except (InvalidId, TypeError):
+        return None
+
+
+async def find_user_by_email(email: str) -> dict | None:
+    return await user_collection().find_one({"email": email})
+
+
+async def find_user_by_id(user_id: str, projection: dict | None = None) -> dict | None:
+    oid = _object_id(user_id)
+    if oid is None:
+        return None
+    return await user_collection().find_one({"_id": oid}, projection)
+
+
+async def insert_user(doc: dict) -> str:
+    result = await user_collection().insert_one(doc)
+    return str(result.inserted_id)
+
+
+async def update_user(user_id: str, fields: dict) -> bool:
+    """사용자가 있으면 True (matched 기준)"""
+    oid = _object_id(user_id)
+    if oid is None:
+        return False
+    result = await user_collection().update_one({"_id": oid}, {"$set": fields})
+    return result.matched_count > 0
+
+
+async def increment_token_version(user_id: str) -> int:
+    """token_version + 1 후 새 값 반환 (없는 사용자는 0)"""
+    oid = _object_id(user_id)
+    if oid is None:
+        return 0
+    doc = await user_collection().find_one_and_update(
+        {"_id": oid}, {"$inc": {"token_version": 1}},
+        projection={"token_version": 1}, return_document=ReturnDocument.AFTER,
+    )
+    return doc.get("token_version", 0) if doc else 0
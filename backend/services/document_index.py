@@ -0,0 +1,112 @@
+from langchain.schema import Document
+from services.vector_loader import load_vectorstore, register_reload_hook
+from collections import OrderedDict
+import heapq
+import os
+import threading
+
+# ✅ 벡터스토어 문서 보조 인덱스 (title / topic / chunk_id prefix → chunk_id 정렬된 문서 목록)
+#   벡터스토어별로 한 번만 만들고, reload_vectorstore 호출 시 다시 만든다.
+
+_indexes = {}
+_lock = threading.Lock()
+TOPIC_CACHE_SIZE = int(os.getenv("DOCUMENT_INDEX_TOPIC_CACHE", "1024"))
+
+
+def chunk_sort_key(doc: Document):
+    return doc.metadata.get("chunk_id", "")
+
+
+def chunk_prefix(chunk_id) -> str:
+    # 예: "esg_Manual_012" → "esg_Manual"
+    return str(chunk_id).rsplit("_", 1)[0] if chunk_id else ""
+
+
+def fetch_all_documents(vectorstore) -> list[Document]:
+    # FAISS 등 docstore가 있는 경우
+    if hasattr(vectorstore, "docstore"):
+        return list(vectorstore.docstore._dict.values())
+
+    # Qdrant: 컬렉션 전체를 scroll 하여 payload → Document 변환
+    docs = []
+    offset = None
+    while True:
+        points, offset = vectorstore.client.scroll(
+            collection_name=vectorstore.collection_name,
+            limit=256,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False,
+        )
+        for point in points:
+            payload = point.payload or {}
+            docs.append(Document(
+                page_content=payload.get(vectorstore.content_payload_key) or "",
+                metadata=payload.get(vectorstore.metadata_payload_key) or {},
+            ))
+        if offset is None:
+            break
+    return docs
+
+
+class DocumentIndex:
+    def __init__(self, docs: list[Document]):
+        self.documents = sorted(docs, key=chunk_sort_key)
+        self.by_title = {}
+        self.by_chunk_prefix = {}
+        # topic(부분 문자열) → 문서 목록. 고유 title 목록만 스캔해서 채우는 지연 캐시 (LRU, 최대 TOPIC_CACHE_SIZE개)
+        self.by_topic = OrderedDict()
+        self._topic_lock = threading.Lock()
+
+        # 이미 정렬된 순서대로 넣으므로 각 목록도 chunk_id 순으로 정렬된 상태
+        for doc in self.documents:
+            self.by_title.setdefault(doc.metadata.get("title") or "", []).append(doc)
+            self.by_chunk_prefix.setdefault(chunk_prefix(doc.metadata.get("chunk_id")), []).append(doc)
+
+    def with_title(self, title: str) -> list[Document]:
+        return list(self.by_title.get(title, []))
+
+    def with_topic(self, topic: str) -> list[Document]:
+        """title에 topic이 포함된 문서 (기존 `topic in title` 필터와 동일)"""
+        with self._topic_lock:
+            docs = self.by_topic.get(topic)
+            if docs is not None:
+                self.by_topic.move_to_end(topic)
+                return list(docs)
+
+        groups = [docs for title, docs in self.by_title.items() if topic in title]
+        docs = list(heapq.merge(*groups, key=chunk_sort_key)) if len(groups) > 1 else (groups[0] if groups else [])
+        with self._topic_lock:
+            self.by_topic[topic] = docs
+            while len(self.by_topic) > TOPIC_CACHE_SIZE:
+                self.by_topic.popitem(last=False)
+        return list(docs)
+
+    def with_chunk_prefix(self, prefix: str) -> list[Document]:
+        return list(self.by_chunk_prefix.get(prefix, []))
+
+
+def get_document_index(index_name: str) -> DocumentIndex:
+    index = _indexes.get(index_name)
+    if index is not None:
+        return index
+
+    with _lock:
+        index = _indexes.get(index_name)
+        if index is None:
+            docs = fetch_all_documents(load_vectorstore(index_name))
+            index = DocumentIndex(docs)
+            _indexes[index_name] = index
+            print(f"🗂️ 문서 인덱스 생성: {index_name} ({len(docs)}개 청크, {len(index.by_title)}개 title)")
+    return index
+
+
+def invalidate_document_index(index_name: str | None = None):
+    with _lock:
+        if index_name is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(index_name, None)
+
+
+register_reload_hook(invalidate_document_index)
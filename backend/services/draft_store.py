@@ -1,41 +1,48 @@
-from datetime import datetime
-from services.db import draft_collection
-from services.db import input_collection
-from fastapi import HTTPException
-
-def delete_draft(topic: str, company: str) -> bool:
-    result = draft_collection.delete_one({"topic": topic, "company": company})
-    return result.deleted_count > 0
-
-
-def save_draft(topic: str, company: str, draft: str):
-    draft_collection.update_one(
-        {"topic": topic, "company": company},
-        {
-            "$set": {
-                "draft": draft,
-                "updated_at": datetime.utcnow()
-            }
-        },
-        upsert=True
-    )
-
-def load_draft(topic: str, company: str):
-    doc = draft_collection.find_one({"topic": topic, "company": company})
-    return doc["draft"] if doc else None
-
-def save_input_data(topic: str, company: str, data: dict):
-    input_collection.update_one(
-        {"topic": topic, "company": company},
-        {
-            "$set": {
-                "data": data,
-                "updated_at": datetime.utcnow()
-            }
-        },
-        upsert=True
-    )
-
-def load_input_data(topic: str, company: str):
-    doc = input_collection.find_one({"topic": topic, "company": company})
-    return doc.get("data", {}) if doc else {}
+from services import data_access
+
+# ✅ 지표 초안 / 입력값 저장소 (services.data_access 비동기 repository 사용)
+
+
+async def delete_draft(topic: str, company: str) -> bool:
+    return await data_access.delete_draft(topic, company)
+
+
+async def save_draft(topic: str, company: str, draft: str):
+    await data_access.save_draft(topic, company, draft)
+
+
+async def load_draft(topic: str, company: str):
+    return await data_access.get_draft(topic, company)
+
+
+async def save_input_data(topic: str, company: str, data: dict):
+    await data_access.save_input_data(topic, company, data)
+
+
+async def load_input_data(topic: str, company: str):
+    return await data_access.get_input_data(topic, company)
+
+
+async def indicator_statuses(company: str) -> dict:
+    return await data_access.indicator_statuses(company)
+
+
+async def complete_indicator(topic: str, company: str) -> bool:
+    return await data_access.complete_draft(topic, company)
+
+
+# ✅ 일괄 저장/조회 (결과: saved 수 + 실패한 항목 index)
+async def save_drafts_bulk(items: list[tuple[str, str, str]]) -> dict:
+    return await data_access.save_drafts_bulk(items)
+
+
+async def load_drafts_bulk(pairs: list[tuple[str, str]]) -> dict:
+    return await data_access.get_drafts_bulk(pairs)
+
+
+async def save_input_data_bulk(items: list[tuple[str, str, dict]]) -> dict:
+    return await data_access.save_input_data_bulk(items)
+
+
+async def load_input_data_bulk(pairs: list[tuple[str, str]]) -> dict:
+    return await data_access.get_input_data_bulk(pairs)
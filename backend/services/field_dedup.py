@@ -0,0 +1,156 @@
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from difflib import SequenceMatcher
+import math
+import re
+
+# ✅ LLM 추천 항목 ↔ 표 항목명 중복 판정
+#   기존: 추천 항목마다 모든 표 항목과 normalize() + SequenceMatcher.ratio() 반복
+#   변경: 표 항목은 한 번만 정규화 → 길이 정렬 + 문자 역색인
+#     1) 길이 범위(real_quick_ratio 상한)로 후보 축소
+#     2) 역색인으로 공통 문자 수(quick_ratio 상한)를 한 번에 집계
+#     3) 상한이 threshold 이상인 후보만 SequenceMatcher.ratio()로 확정
+#   → 판정 결과는 기존 함수와 동일
+
+THRESHOLD = 0.8
+_EPS = 1e-9
+
+_NORMALIZE_RE = re.compile(r"[\s()%/+\-.,]")
+
+
+def normalize(text: str) -> str:
+    return _NORMALIZE_RE.sub("", text).lower()
+
+
+class FieldDeduplicator:
+    def __init__(self, table_fields: list[str], threshold: float = THRESHOLD):
+        self.threshold = threshold
+        norms = [normalize(f) for f in table_fields]
+        # 길이 순 정렬 (같은 길이는 원래 순서 유지)
+        self.norms = sorted(norms, key=len)
+        self.lengths = [len(n) for n in self.norms]
+        self.joined = "\x00".join(self.norms)
+        self.has_empty = bool(self.norms) and self.lengths[0] == 0
+
+        self.index = {}  # 문자 → [(표 항목 번호, 등장 횟수)]
+        for idx, norm in enumerate(self.norms):
+            for char, count in Counter(norm).items():
+                self.index.setdefault(char, []).append((idx, count))
+
+    def _length_range(self, length: int) -> tuple[int, int]:
+        # 2*min(la, lb) / (la + lb) >= t  ⇔  la*t/(2-t) <= lb <= la*(2-t)/t
+        t = self.threshold
+        if t <= 0:
+            return 0, len(self.norms)
+        low = math.floor(length * t / (2 - t) - _EPS)
+        high = math.ceil(length * (2 - t) / t + _EPS)
+        return bisect_left(self.lengths, low), bisect_right(self.lengths, high)
+
+    def is_similar(self, field: str) -> bool:
+        """표 항목 중 하나라도 SequenceMatcher(None, field, 표 항목).ratio() >= threshold"""
+        query = normalize(field)
+        start, end = self._length_range(len(query))
+        if start >= end:
+            return False
+
+        # quick_ratio 상한: 공통 문자 수(중복 포함)
+        common = {}
+        for char, count in Counter(query).items():
+            for idx, table_count in self.index.get(char, ()):
+                if start <= idx < end:
+                    common[idx] = common.get(idx, 0) + min(count, table_count)
+
+        candidates = [
+            idx for idx in range(start, end)
+            if 2.0 * common.get(idx, 0) >= self.threshold * (len(query) + self.lengths[idx]) - _EPS
+            or len(query) + self.lengths[idx] == 0
+        ]
+        for idx in candidates:
+            if SequenceMatcher(None, query, self.norms[idx]).ratio() >= self.threshold:
+                return True
+        return False
+
+    def is_redundant(self, field: str) -> bool:
+        """유사도 기준 + 포함 관계(한쪽이 다른 쪽에 포함) 기준"""
+        if not self.norms:
+            return False
+        query = normalize(field)
+        # 빈 표 항목은 모든 문자열에 포함됨 / 추천 항목이 표 항목 안에 포함
+        if self.has_empty or query in self.joined:
+            return True
+        # 표 항목이 추천 항목 안에 포함 (길이가 같거나 짧은 항목만)
+        for norm in self.norms[:bisect_right(self.lengths, len(query))]:
+            if norm in query:
+                return True
+        return self.is_similar(field)
+
+    def remove_duplicates(self, fields: list[dict], key: str = "항목") -> list[dict]:
+        return [f for f in fields if not self.is_similar(f[key])]
+
+
+# ---------------------------------------------------------------------------
+# 벤치마크: python -m services.field_dedup
+# ---------------------------------------------------------------------------
+
+def _legacy_is_redundant(llm_field: str, table_fields: list[str], threshold=0.8) -> bool:
+    llm_norm = normalize(llm_field)
+    for table_field in table_fields:
+        table_norm = normalize(table_field)
+        ratio = SequenceMatcher(None, llm_norm, table_norm).ratio()
+        if ratio >= threshold:
+            return True
+        if llm_norm in table_norm or table_norm in llm_norm:
+            return True
+    return False
+
+
+def _legacy_remove_duplicate_fields(required_fields, table_fieldnames):
+    return [
+        field for field in required_fields
+        if all(not SequenceMatcher(None, normalize(field["항목"]), normalize(tf)).ratio() >= 0.8
+               for tf in table_fieldnames)
+    ]
+
+
+if __name__ == "__main__":
+    import argparse
+    import random
+    import time
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fields", type=int, default=60, help="LLM 추천 항목 수")
+    parser.add_argument("--table-fields", type=int, default=2000, help="표 항목명 수")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    words = ["온실가스", "배출량", "에너지", "사용량", "폐기물", "재활용률", "용수", "취수량", "방류량",
+             "대기오염물질", "화학물질", "생물다양성", "보호종", "서식지", "Scope", "총", "직접", "간접",
+             "(tCO2eq)", "(%)", "원단위", "감축", "목표", "실적"]
+
+    def make_name():
+        return " ".join(random.choice(words) for _ in range(random.randint(1, 4)))
+
+    table_fields = [make_name() for _ in range(args.table_fields)]
+    fields = [{"항목": make_name()} for _ in range(args.fields)]
+    # 일부는 표 항목을 살짝 바꿔서 넣음 (중복 판정 대상)
+    for f in fields[: args.fields // 3]:
+        f["항목"] = random.choice(table_fields) + random.choice(["", " 현황", "(%)", " 합계"])
+
+    start = time.perf_counter()
+    legacy_kept = _legacy_remove_duplicate_fields(fields, table_fields)
+    legacy_redundant = [_legacy_is_redundant(f["항목"], table_fields) for f in fields]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    dedup = FieldDeduplicator(table_fields)
+    kept = dedup.remove_duplicates(fields)
+    redundant = [dedup.is_redundant(f["항목"]) for f in fields]
+    new_time = time.perf_counter() - start
+
+    assert kept == legacy_kept, "remove_duplicates 결과 불일치"
+    assert redundant == legacy_redundant, "is_redundant 결과 불일치"
+    print(f"추천 {len(fields)}개 × 표 항목 {len(table_fields)}개")
+    print(f"  기존: {legacy_time * 1000:.1f} ms")
+    print(f"  변경: {new_time * 1000:.1f} ms (x{legacy_time / max(new_time, 1e-9):.1f})")
+    print(f"  유지 {len(kept)}개 / 포함·유사 중복 {sum(redundant)}개 (결과 동일)")
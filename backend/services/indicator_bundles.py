@@ -0,0 +1,235 @@
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import quote
+import argparse
+import ast
+import hashlib
+import json
+import os
+import threading
+import time
+
+from services.document_index import get_document_index
+from services.table_assets import get_table_asset
+from services.asset_manifest import tables_for_page
+from services.asset_paths import BACKEND_DIR, MANUAL_TABLE_DIR
+from services.vector_loader import get_qdrant_client, register_reload_hook
+
+# ✅ 지표(topic)별 fetch-data 번들
+#   청크 / pages / 표 HTML·텍스트는 topic과 정적 매뉴얼에만 의존 → 한 번 만들어 JSON으로 저장
+#   - 오프라인 빌드: python -m services.indicator_bundles 302-1 303-3 ...  (또는 --all-titles)
+#   - 런타임: 메모리 → 디스크(data/indicator_bundles) → 없으면 만들어서 저장
+#   - 직렬화된 JSON과 ETag를 같이 들고 있어서 응답은 바이트 그대로 반환
+#   - 번들마다 원본 fingerprint(매뉴얼 컬렉션 point 수 + 표 디렉토리 mtime)를 같이 저장
+#     → 재시작 / 재적재 후 fingerprint가 다르면 다시 만듦 (reload 시 fingerprint 재계산)
+#   - 청크가 없는 topic(임의 문자열)은 저장하지 않음, 메모리는 LRU로 최대 MEMORY_ENTRIES개
+
+BUNDLE_DIR = Path(os.getenv("INDICATOR_BUNDLE_DIR", BACKEND_DIR / "data/indicator_bundles"))
+DEFAULT_TABLE_DIR = MANUAL_TABLE_DIR
+BUNDLE_VERSION = 2
+MEMORY_ENTRIES = int(os.getenv("INDICATOR_BUNDLE_MEMORY_ENTRIES", "256"))
+FINGERPRINT_TTL = float(os.getenv("INDICATOR_BUNDLE_FINGERPRINT_TTL", "300"))
+
+
+def parse_pages(raw_pages) -> list[int]:
+    """pages 메타데이터 (list / int / "[1, 2]" 문자열) → 페이지 목록"""
+    if isinstance(raw_pages, list):
+        return list(raw_pages)
+    if isinstance(raw_pages, int):
+        return [raw_pages]
+    if isinstance(raw_pages, str):
+        try:
+            parsed = json.loads(raw_pages) if raw_pages.startswith("[") else ast.literal_eval(raw_pages)
+            if isinstance(parsed, list):
+                return parsed
+            if isinstance(parsed, int):
+                return [parsed]
+        except Exception as e:
+            print(f"❌ pages 파싱 실패: {raw_pages} → {e}")
+    return []
+
+
+class IndicatorBundle:
+    def __init__(self, data: dict, built_at: float, fingerprint: dict | None = None):
+        self.data = data
+        self.built_at = built_at
+        self.fingerprint = fingerprint
+        # 응답 본문에 그대로 쓰는 직렬화 결과
+        self.body = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        self.etag = hashlib.sha256(self.body.encode("utf-8")).hexdigest()[:32]
+
+
+class IndicatorBundleStore:
+    def __init__(self, index_name: str, table_dir: Path, bundle_dir: Path = BUNDLE_DIR):
+        self.index_name = index_name
+        self.table_dir = Path(table_dir)
+        self.bundle_dir = Path(bundle_dir)
+        self._bundles = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._fingerprint_at = 0.0
+
+    def _path(self, topic: str) -> Path:
+        return self.bundle_dir / self.index_name / f"{quote(topic, safe='')}.json"
+
+    def _source_fingerprint(self) -> dict:
+        """매뉴얼 컬렉션 point 수 + 표 디렉토리(파일 수, 최신 mtime)"""
+        try:
+            points = get_qdrant_client().get_collection(self.index_name).points_count
+        except Exception as e:
+            print(f"⚠️ 번들 fingerprint: 컬렉션 조회 실패 ({self.index_name}) → {e}")
+            points = None
+        files, latest = 0, 0
+        try:
+            for entry in os.scandir(self.table_dir):
+                if entry.is_file():
+                    files += 1
+                    latest = max(latest, entry.stat().st_mtime_ns)
+        except FileNotFoundError:
+            pass
+        return {"points": points, "table_files": files, "table_mtime_ns": latest}
+
+    def fingerprint(self) -> dict:
+        now = time.monotonic()
+        if self._fingerprint is None or now - self._fingerprint_at > FINGERPRINT_TTL:
+            fingerprint = self._source_fingerprint()
+            with self._lock:
+                if fingerprint != self._fingerprint:
+                    self._bundles.clear()
+                self._fingerprint, self._fingerprint_at = fingerprint, now
+        return self._fingerprint
+
+    def build(self, topic: str) -> dict:
+        filtered = get_document_index(self.index_name).with_topic(topic)
+
+        pages = set()
+        for doc in filtered:
+            pages.update(parse_pages(doc.metadata.get("pages", [])))
+
+        table_htmls, table_texts, table_paths = [], [], []
+        for page in sorted(pages):
+            for path in tables_for_page(self.table_dir, page):
+                try:
+                    asset = get_table_asset(path)
+                    if asset and asset.has_table:
+                        table_htmls.append(asset.table_html)
+                        table_texts.append(asset.text)
+                        table_paths.append(str(path))
+                except Exception as e:
+                    print(f"❌ 표 파싱 실패: {path} → {e}")
+
+        return {
+            "topic": topic,
+            "chunk_count": len(filtered),
+            "chunks": [doc.page_content for doc in filtered],
+            "table_htmls": table_htmls,
+            "table_paths": table_paths,
+            "table_texts": table_texts,
+            "pages": sorted(pages),
+        }
+
+    def _load_from_disk(self, topic: str, fingerprint: dict) -> IndicatorBundle | None:
+        if fingerprint.get("points") is None:
+            # 컬렉션 상태를 모르면 디스크 번들을 검증할 수 없음
+            return None
+        path = self._path(topic)
+        if not path.exists():
+            return None
+        try:
+            stored = json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            print(f"⚠️ 번들 로드 실패: {path} → {e}")
+            return None
+        if stored.get("version") != BUNDLE_VERSION or stored.get("fingerprint") != fingerprint:
+            return None
+        return IndicatorBundle(stored["data"], stored["built_at"], fingerprint)
+
+    def _save_to_disk(self, topic: str, bundle: IndicatorBundle):
+        path = self._path(topic)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({
+                "version": BUNDLE_VERSION,
+                "built_at": bundle.built_at,
+                "fingerprint": bundle.fingerprint,
+                "data": bundle.data,
+            }, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"⚠️ 번들 저장 실패: {path} → {e}")
+
+    def _remember(self, topic: str, bundle: IndicatorBundle):
+        with self._lock:
+            self._bundles[topic] = bundle
+            self._bundles.move_to_end(topic)
+            while len(self._bundles) > MEMORY_ENTRIES:
+                self._bundles.popitem(last=False)
+
+    def rebuild(self, topic: str) -> IndicatorBundle:
+        fingerprint = self.fingerprint()
+        bundle = IndicatorBundle(self.build(topic), time.time(), fingerprint)
+        if not bundle.data["chunk_count"]:
+            # 매뉴얼에 없는 topic → 응답만 하고 디스크/메모리에는 남기지 않음
+            return bundle
+        if fingerprint.get("points") is not None:
+            self._save_to_disk(topic, bundle)
+        self._remember(topic, bundle)
+        print(f"📦 번들 생성: {self.index_name}/{topic} (청크 {bundle.data['chunk_count']}개, 표 {len(bundle.data['table_htmls'])}개)")
+        return bundle
+
+    def get(self, topic: str) -> IndicatorBundle:
+        fingerprint = self.fingerprint()
+        with self._lock:
+            bundle = self._bundles.get(topic)
+            if bundle is not None:
+                self._bundles.move_to_end(topic)
+                return bundle
+        bundle = self._load_from_disk(topic, fingerprint)
+        if bundle is not None:
+            self._remember(topic, bundle)
+            return bundle
+        return self.rebuild(topic)
+
+    def invalidate(self, index_name: str | None = None):
+        if index_name not in (None, self.index_name):
+            return
+        with self._lock:
+            self._bundles.clear()
+            self._fingerprint = None
+
+
+_stores = {}
+
+
+def get_bundle_store(index_name: str = "esg_Manual", table_dir: Path = DEFAULT_TABLE_DIR) -> IndicatorBundleStore:
+    key = (index_name, str(table_dir))
+    store = _stores.get(key)
+    if store is None:
+        store = _stores.setdefault(key, IndicatorBundleStore(index_name, table_dir))
+    return store
+
+
+def _invalidate_bundles(index_name: str | None = None):
+    for store in list(_stores.values()):
+        store.invalidate(index_name)
+
+
+register_reload_hook(_invalidate_bundles)
+
+
+if __name__ == "__main__":
+    # 매뉴얼/표 재적재 후 실행: python -m services.indicator_bundles 302-1 303-3 --index esg_Manual
+    parser = argparse.ArgumentParser()
+    parser.add_argument("topics", nargs="*", help="번들을 만들 지표 topic 목록")
+    parser.add_argument("--all-titles", action="store_true", help="인덱스의 모든 title로 번들 생성")
+    parser.add_argument("--index", default="esg_Manual")
+    parser.add_argument("--table-dir", default=str(DEFAULT_TABLE_DIR))
+    args = parser.parse_args()
+
+    store = get_bundle_store(args.index, Path(args.table_dir))
+    topics = list(args.topics)
+    if args.all_titles:
+        topics += [t for t in get_document_index(args.index).by_title if t]
+    for topic in dict.fromkeys(topics):
+        store.rebuild(topic)
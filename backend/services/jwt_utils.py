@@ -1,30 +1,135 @@
 
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+import threading
+import time
+
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-from bson import ObjectId
-from services.database import users_collection
+from services.data_access import find_user_by_id, increment_token_version
 
 import os
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "eri1")
 ALGORITHM = "HS256"
+ACCESS_TOKEN_MINUTES = int(os.getenv("ACCESS_TOKEN_MINUTES", "60"))
+
+# ✅ 토큰 claim(sub / email / ver)만으로 사용자 확인 → 요청마다 DB 조회하지 않음
+#   - ver: 사용자 문서의 token_version. revoke_user_tokens() 로 올리면 이전 토큰은 거부
+#   - 이 프로세스에서 revoke한 버전은 바로 반영, 다른 인스턴스에서 revoke한 버전은
+#     사용자 캐시(AUTH_USER_CACHE_TTL 초)로 DB의 token_version을 확인해 반영
+#     (AUTH_CHECK_TOKEN_VERSION=false 로 끄면 claim만 확인 → 단일 인스턴스 전용)
+#   - 프로필이 필요한 엔드포인트는 get_current_user_record (TTL 캐시된 사용자 문서)
+CHECK_TOKEN_VERSION = os.getenv("AUTH_CHECK_TOKEN_VERSION", "true").lower() == "true"
+USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "1024"))
+REVOKED_CACHE_SIZE = int(os.getenv("AUTH_REVOKED_CACHE_SIZE", "10000"))
+# ver claim이 없는 이전 형식 토큰 (유효기간 60분) → 프로세스 시작 후 토큰 유효기간이 지나면 거부
+#   그 시각 이후에는 배포 전에 발급된 이전 형식 토큰이 모두 만료되어 있음
+LEGACY_TOKEN_MINUTES = 60
+LEGACY_TOKEN_CUTOVER = datetime.now(timezone.utc) + timedelta(minutes=max(ACCESS_TOKEN_MINUTES, LEGACY_TOKEN_MINUTES))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+_user_cache = OrderedDict()  # user_id → (만료 시각, 사용자 문서)
+# user_id → (유효한 최소 token_version, 기록 만료 시각). 이 프로세스에서 revoke한 값
+#   revoke 시점 이전 토큰은 ACCESS_TOKEN_MINUTES 안에 모두 만료되므로 그 뒤로는 기록 불필요
+_min_versions = OrderedDict()
+_lock = threading.Lock()
+
+
+def create_access_token(user: dict) -> str:
+    token_data = {
+        "sub": str(user["_id"]),
+        "email": user["email"],
+        "ver": user.get("token_version", 0),
+        "exp": datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_MINUTES)
+    }
+    return jwt.encode(token_data, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def invalidate_user(user_id: str):
+    with _lock:
+        _user_cache.pop(user_id, None)
+
+
+async def load_user_record(user_id: str) -> dict | None:
+    now = time.time()
+    with _lock:
+        cached = _user_cache.get(user_id)
+        if cached and cached[0] > now:
+            _user_cache.move_to_end(user_id)
+            return cached[1]
+
+    user = await find_user_by_id(user_id, {"password": 0})
+    if user is not None:
+        with _lock:
+            _user_cache[user_id] = (now + USER_CACHE_TTL, user)
+            _user_cache.move_to_end(user_id)
+            while len(_user_cache) > USER_CACHE_SIZE:
+                _user_cache.popitem(last=False)
+    return user
+
+
+async def revoke_user_tokens(user_id: str) -> int:
+    """token_version 증가 → 지금까지 발급된 토큰 모두 무효"""
+    version = await increment_token_version(user_id)
+    now = time.time()
+    with _lock:
+        _min_versions.pop(user_id, None)
+        _min_versions[user_id] = (version, now + ACCESS_TOKEN_MINUTES * 60)
+        while _min_versions and (len(_min_versions) > REVOKED_CACHE_SIZE
+                                 or next(iter(_min_versions.values()))[1] <= now):
+            _min_versions.popitem(last=False)
+    invalidate_user(user_id)
+    return version
+
+
+def decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="토큰에 사용자 정보 없음")
     except JWTError:
         raise HTTPException(status_code=401, detail="유효하지 않은 토큰입니다")
+    if payload.get("sub") is None:
+        raise HTTPException(status_code=401, detail="토큰에 사용자 정보 없음")
+    return payload
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    payload = decode_token(token)
+    user_id = payload["sub"]
+
+    # 이전 형식 토큰 (email/ver claim 없음) → 전환 시각 이후 거부, 그 전에는 DB 조회
+    if "email" not in payload or "ver" not in payload:
+        if datetime.now(timezone.utc) >= LEGACY_TOKEN_CUTOVER:
+            raise HTTPException(status_code=401, detail="만료된 토큰입니다. 다시 로그인해주세요")
+        user = await load_user_record(user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="사용자 없음")
+        if user.get("token_version", 0) > 0:
+            # logout-all 이후 → ver 없는 토큰도 무효
+            raise HTTPException(status_code=401, detail="만료된 토큰입니다. 다시 로그인해주세요")
+        return {"id": str(user["_id"]), "email": user["email"]}
+
+    revoked = _min_versions.get(user_id)
+    min_version = revoked[0] if revoked and revoked[1] > time.time() else 0
+    if CHECK_TOKEN_VERSION:
+        user = await load_user_record(user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="사용자 없음")
+        min_version = max(min_version, user.get("token_version", 0))
+    if payload["ver"] < min_version:
+        raise HTTPException(status_code=401, detail="만료된 토큰입니다. 다시 로그인해주세요")
 
-    user = users_collection.find_one({"_id": ObjectId(user_id)})
-    if not user:
-        raise HTTPException(status_code=404, detail="사용자 없음")
-    
     return {
-        "id": str(user["_id"]),
-        "email": user["email"]
-    }
\ No newline at end of file
+        "id": user_id,
+        "email": payload["email"]
+    }
+
+
+async def get_current_user_record(user: dict = Depends(get_current_user)) -> dict:
+    """프로필 등 사용자 문서가 필요한 엔드포인트용 (TTL 캐시)"""
+    record = await load_user_record(user["id"])
+    if not record:
+        raise HTTPException(status_code=404, detail="사용자 없음")
+    return record
@@ -0,0 +1,245 @@
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime
+from pathlib import Path
+import hashlib
+import json
+import os
+import threading
+import time
+
+# ✅ 정적 입력에 대한 LLM 결과 캐시 (summarize-indicator / infer-required-data)
+#   키 = sha256(endpoint, topic, chunks, table_texts, 프롬프트, 모델 설정) → 같은 입력이면 GPT를 다시 부르지 않음
+#   - 저장소: 로컬 디스크(기본) 또는 MongoDB (LLM_RESULT_CACHE_BACKEND=disk|mongo|off)
+#   - 입력(chunks 등)은 클라이언트가 보내므로 크기 제한 필수
+#     디스크: 항목 수 / 전체 바이트 상한 초과 시 오래 안 쓴 파일부터 삭제, Mongo: TTL 인덱스
+#   - 같은 키로 동시에 들어온 첫 요청들은 진행 중인 호출 하나를 같이 기다림 (single-flight)
+#   - 실패(예외)는 캐시하지 않음
+
+BACKEND = os.getenv("LLM_RESULT_CACHE_BACKEND", "disk").lower()
+CACHE_DIR = Path(os.getenv("LLM_RESULT_CACHE_DIR", Path(__file__).resolve().parent.parent / "data/llm_cache"))
+TTL = float(os.getenv("LLM_RESULT_CACHE_TTL", str(7 * 24 * 3600)))  # 0 = 만료 없음
+MEMORY_ENTRIES = int(os.getenv("LLM_RESULT_CACHE_MEMORY_ENTRIES", "512"))
+DISK_MAX_ENTRIES = int(os.getenv("LLM_RESULT_CACHE_MAX_ENTRIES", "20000"))
+DISK_MAX_BYTES = int(os.getenv("LLM_RESULT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+def cache_key(endpoint: str, topic: str, chunks: list[str], table_texts: list[str], prompt: str,
+              settings: dict | None = None) -> str:
+    """settings: ChatOpenAI 생성에 쓴 설정 dict 그대로 (model, temperature, max_tokens ...)"""
+    payload = json.dumps(
+        [endpoint, topic, chunks, table_texts, prompt, settings or {}],
+        ensure_ascii=False, separators=(",", ":"), sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskStore:
+    def __init__(self, cache_dir: Path, max_entries: int = DISK_MAX_ENTRIES, max_bytes: int = DISK_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._scan()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _scan(self):
+        """디스크의 캐시 파일 목록 (mtime 오래된 순) → 항목 수 / 바이트 집계"""
+        found = []
+        if self.cache_dir.exists():
+            for sub in os.scandir(self.cache_dir):
+                if not sub.is_dir():
+                    continue
+                for entry in os.scandir(sub.path):
+                    if entry.name.endswith(".json"):
+                        try:
+                            st = entry.stat()
+                        except FileNotFoundError:
+                            continue
+                        found.append((st.st_mtime, entry.name[:-len(".json")], st.st_size))
+        found.sort()
+        self._entries = OrderedDict((key, size) for _, key, size in found)  # key → 크기 (LRU 순)
+        self._bytes = sum(self._entries.values())
+
+    def _remove(self, key: str):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._bytes -= size
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        # 다른 워커가 쓴 파일도 반영되도록 다시 집계한 뒤, 상한의 90%까지 오래 안 쓴 것부터 삭제
+        self._scan()
+        removed = 0
+        while self._entries and (len(self._entries) > self.max_entries * 0.9 or self._bytes > self.max_bytes * 0.9):
+            self._remove(next(iter(self._entries)))
+            removed += 1
+        if removed:
+            print(f"🧹 LLM 캐시 {removed}개 삭제 (상한 초과)")
+
+    def get(self, key: str):
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ LLM 캐시 읽기 실패: {path} → {e}")
+            return None
+        if TTL and time.time() - entry.get("created_at", 0) > TTL:
+            with self._lock:
+                self._remove(key)
+            return None
+        # 적중 → mtime 갱신 (LRU)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return entry["value"]
+
+    def put(self, key: str, value, meta: dict):
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            body = json.dumps({**meta, "value": value, "created_at": time.time()}, ensure_ascii=False).encode("utf-8")
+            tmp.write_bytes(body)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"⚠️ LLM 캐시 저장 실패: {path} → {e}")
+            return
+        with self._lock:
+            self._bytes += len(body) - self._entries.pop(key, 0)
+            self._entries[key] = len(body)
+            if len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._evict()
+
+
+class MongoStore:
+    def __init__(self):
+        from services.data_access import DRAFTS_DB, get_sync_database
+        self.collection = get_sync_database(DRAFTS_DB)["llm_results"]
+        if TTL:
+            # Mongo가 만료 문서를 직접 삭제
+            self.collection.create_index("created_at", expireAfterSeconds=int(TTL))
+
+    def get(self, key: str):
+        doc = self.collection.find_one({"_id": key}, {"value": 1, "created_at": 1})
+        if not doc:
+            return None
+        if TTL and (datetime.utcnow() - doc["created_at"]).total_seconds() > TTL:
+            return None
+        return doc["value"]
+
+    def put(self, key: str, value, meta: dict):
+        self.collection.update_one(
+            {"_id": key},
+            {"$set": {**meta, "value": value, "created_at": datetime.utcnow()}},
+            upsert=True,
+        )
+
+
+class LLMResultCache:
+    def __init__(self, store=None):
+        self.store = store
+        self._memory = OrderedDict()
+        self._inflight = {}  # key → Future
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    def _get(self, key: str):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        if self.store is None:
+            return None
+        try:
+            value = self.store.get(key)
+        except Exception as e:
+            print(f"⚠️ LLM 캐시 조회 실패: {e}")
+            return None
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    def _remember(self, key: str, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > MEMORY_ENTRIES:
+                self._memory.popitem(last=False)
+
+    def get_or_compute(self, key: str, compute, meta: dict | None = None):
+        """캐시 적중이면 저장된 값, 아니면 compute() 결과를 저장 후 반환. compute 예외는 그대로 전파"""
+        value = self._get(key)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            return value
+
+        with self._lock:
+            if key in self._memory:
+                # 조회와 잠금 사이에 다른 요청이 계산을 끝낸 경우
+                self.hits += 1
+                return self._memory[key]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+            else:
+                self.shared += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            self._remember(key, value)
+            if self.store is not None:
+                try:
+                    self.store.put(key, value, meta or {})
+                except Exception as e:
+                    print(f"⚠️ LLM 캐시 저장 실패: {e}")
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": BACKEND,
+                "memory_entries": len(self._memory),
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared_inflight": self.shared,
+            }
+
+
+def llm_result_cache_from_env() -> LLMResultCache | None:
+    if BACKEND == "off":
+        return None
+    if BACKEND == "mongo":
+        try:
+            return LLMResultCache(MongoStore())
+        except Exception as e:
+            print(f"⚠️ LLM 캐시 Mongo 연결 실패 → 디스크 사용: {e}")
+    return LLMResultCache(DiskStore(CACHE_DIR))
@@ -0,0 +1,99 @@
+from collections import deque
+import math
+import os
+import threading
+import time
+
+from fastapi import HTTPException
+
+# ✅ 로그인 시도 제한 (프로세스 내 sliding window)
+#   - 이메일별: 실패 LOGIN_MAX_FAILURES회 / LOGIN_WINDOW_SECONDS → 429 (성공하면 초기화)
+#   - IP별: 시도 LOGIN_IP_MAX_ATTEMPTS회 / LOGIN_IP_WINDOW_SECONDS → 429
+#   bcrypt 검증 전에 확인하므로 제한된 요청은 CPU를 쓰지 않음
+#   - 배포 환경은 프록시 뒤 → request.client.host는 프록시 주소
+#     TRUSTED_PROXY_HOPS(기본 1)개의 신뢰 프록시가 붙인 X-Forwarded-For 항목에서 실제 IP 사용
+#     프록시 없이 직접 노출하면 0 (헤더를 위조할 수 있으므로)
+
+MAX_FAILURES = int(os.getenv("LOGIN_MAX_FAILURES", "5"))
+WINDOW_SECONDS = float(os.getenv("LOGIN_WINDOW_SECONDS", "300"))
+IP_MAX_ATTEMPTS = int(os.getenv("LOGIN_IP_MAX_ATTEMPTS", "30"))
+IP_WINDOW_SECONDS = float(os.getenv("LOGIN_IP_WINDOW_SECONDS", "60"))
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "1"))
+MAX_KEYS = 10000
+
+
+class SlidingWindow:
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._events = {}  # key → deque[시각]
+        self._lock = threading.Lock()
+
+    def _trim(self, key: str, now: float) -> deque:
+        events = self._events.get(key)
+        if events is None:
+            if len(self._events) >= MAX_KEYS:
+                # 오래된 키부터 정리
+                for stale in [k for k, v in self._events.items() if not v or v[-1] <= now - self.window]:
+                    del self._events[stale]
+            events = self._events.setdefault(key, deque())
+        while events and events[0] <= now - self.window:
+            events.popleft()
+        return events
+
+    def retry_after(self, key: str) -> int:
+        """제한에 걸렸으면 남은 초, 아니면 0"""
+        now = time.time()
+        with self._lock:
+            events = self._trim(key, now)
+            if len(events) < self.limit:
+                return 0
+            return max(1, math.ceil(events[0] + self.window - now))
+
+    def add(self, key: str):
+        now = time.time()
+        with self._lock:
+            self._trim(key, now).append(now)
+
+    def reset(self, key: str):
+        with self._lock:
+            self._events.pop(key, None)
+
+
+def client_ip(request) -> str | None:
+    peer = request.client.host if request.client else None
+    if TRUSTED_PROXY_HOPS <= 0:
+        return peer
+    forwarded = [h.strip() for h in request.headers.get("x-forwarded-for", "").split(",") if h.strip()]
+    # 오른쪽 끝부터 신뢰 프록시가 붙인 항목 → 마지막 신뢰 홉이 본 클라이언트 주소
+    if len(forwarded) >= TRUSTED_PROXY_HOPS:
+        return forwarded[-TRUSTED_PROXY_HOPS]
+    return forwarded[0] if forwarded else peer
+
+
+_failures = SlidingWindow(MAX_FAILURES, WINDOW_SECONDS)
+_attempts = SlidingWindow(IP_MAX_ATTEMPTS, IP_WINDOW_SECONDS)
+
+
+def check_login_allowed(email: str, client_ip: str | None):
+    """제한 초과 시 429"""
+    wait = max(
+        _failures.retry_after(email.lower()),
+        _attempts.retry_after(client_ip) if client_ip else 0,
+    )
+    if wait:
+        raise HTTPException(
+            status_code=429,
+            detail="로그인 시도가 너무 많습니다. 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": str(wait)},
+        )
+    if client_ip:
+        _attempts.add(client_ip)
+
+
+def record_login_failure(email: str):
+    _failures.add(email.lower())
+
+
+def record_login_success(email: str):
+    _failures.reset(email.lower())
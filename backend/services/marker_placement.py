@@ -0,0 +1,147 @@
+from collections import Counter
+import math
+import os
+import re
+
+# ✅ 표 마커([[TABLE_N]]) 위치 결정
+#   문단마다 SequenceMatcher를 돌리던 방식 대신, 문단을 문자 n-gram TF-IDF 벡터로 한 번만 만들어 두고
+#   표 텍스트는 역색인(n-gram → 문단)으로 코사인 유사도를 계산
+#   - 유사도 > THRESHOLD 인 문단 뒤에 삽입, 없으면 본문 끝에 추가
+#     코사인 유사도는 SequenceMatcher.ratio와 척도가 달라 기존 0.5를 그대로 쓰면 훨씬 자주 삽입됨
+#     → tables_gpt 표로 기존 방식과 삽입/끝 추가 판정을 비교해 0.7로 맞춤 (python -m services.marker_placement)
+#   - 같은 문단에 여러 표가 붙으면 표 번호 순서대로
+
+NGRAM = 2
+THRESHOLD = float(os.getenv("TABLE_MARKER_THRESHOLD", "0.7"))
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def char_ngrams(text: str, n: int = NGRAM) -> Counter:
+    text = _SPACE_RE.sub(" ", text).strip().lower()
+    if len(text) < n:
+        return Counter([text]) if text else Counter()
+    return Counter(text[i:i + n] for i in range(len(text) - n + 1))
+
+
+class MarkerPlacer:
+    def __init__(self, paragraphs: list[str]):
+        self.paragraphs = paragraphs
+        counts = [char_ngrams(p) for p in paragraphs]
+
+        df = Counter()
+        for c in counts:
+            df.update(c.keys())
+        total = len(paragraphs)
+        # 표 쪽에만 있는 n-gram은 문단 점수에 영향이 없으므로 문단 기준 idf만 사용
+        self.idf = {gram: math.log((1 + total) / (1 + freq)) + 1 for gram, freq in df.items()}
+
+        self.postings = {}  # n-gram → [(문단 번호, 정규화된 가중치)]
+        for idx, c in enumerate(counts):
+            weights = {gram: tf * self.idf[gram] for gram, tf in c.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values()))
+            if not norm:
+                continue
+            for gram, w in weights.items():
+                self.postings.setdefault(gram, []).append((idx, w / norm))
+
+    def _query_vector(self, text: str) -> dict:
+        counts = char_ngrams(text)
+        # 문단에 없는 n-gram도 노름에는 포함 (표 전체 대비 유사도)
+        weights = {gram: tf * self.idf.get(gram, 1.0) for gram, tf in counts.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        if not norm:
+            return {}
+        return {gram: w / norm for gram, w in weights.items() if gram in self.postings}
+
+    def best_match(self, table_text: str) -> tuple[int, float]:
+        """(문단 번호, 코사인 유사도). 후보가 없으면 (-1, 0.0)"""
+        scores = {}
+        for gram, qw in self._query_vector(table_text).items():
+            for idx, pw in self.postings[gram]:
+                scores[idx] = scores.get(idx, 0.0) + qw * pw
+        best_idx, best_score = -1, 0.0
+        for idx in sorted(scores):
+            if scores[idx] > best_score:
+                best_idx, best_score = idx, scores[idx]
+        return best_idx, best_score
+
+
+def place_markers(text: str, table_texts: list[str], threshold: float = THRESHOLD) -> str:
+    """[[TABLE_{i+1}]] 마커가 본문에 없으면 가장 비슷한 문단 뒤(또는 본문 끝)에 삽입"""
+    missing = [
+        (f"[[TABLE_{i+1}]]", table_text)
+        for i, table_text in enumerate(table_texts)
+        if f"[[TABLE_{i+1}]]" not in text
+    ]
+    if not missing:
+        return text
+
+    paragraphs = text.split("\n\n")
+    placer = MarkerPlacer(paragraphs)
+    after = {}  # 문단 번호 → [마커]
+    tail = []
+    for marker, table_text in missing:
+        best_idx, best_score = placer.best_match(table_text)
+        if best_score > threshold:
+            print(f"✅ 유사도 {best_score:.2f} → 마커 {marker} 삽입 (문단 {best_idx})")
+            after.setdefault(best_idx, []).append(marker)
+        else:
+            print(f"⚠️ 유사 문단 없음 → 마커 {marker} 본문 끝에 삽입")
+            tail.append(marker)
+
+    result = []
+    for idx, para in enumerate(paragraphs):
+        result.append(para)
+        result.extend(after.get(idx, []))
+    result.extend(tail)
+    return "\n\n".join(result)
+
+
+# ---------------------------------------------------------------------------
+# 임계값 보정: python -m services.marker_placement [표 디렉토리]
+#   실제 표(tables_gpt)로 문단 세트를 만들어 기존 SequenceMatcher 판정(> 0.5)과 일치율 비교
+# ---------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import argparse
+    import random
+    from difflib import SequenceMatcher
+    from pathlib import Path
+
+    from services.table_assets import get_table_asset
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("table_dir", nargs="?", default="../frontend/chatbot/public/tables_gpt")
+    parser.add_argument("--cases", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    assets = [a for a in (get_table_asset(p) for p in sorted(Path(args.table_dir).glob("*.html"))) if a and a.text]
+    filler = ["본 규정은 회사의 지속가능경영 정책을 정의한다.", "담당 부서는 매년 성과를 점검하고 결과를 보고한다.",
+              "이 조항은 이사회 승인 후 시행된다.", "회사는 관련 법령과 국제 기준을 준수한다."]
+
+    def paragraph_for(asset, kind: int) -> str:
+        # 0: 표 그대로 / 1: 제목 + 항목 절반 / 2: 일반 문장 + 항목 2개 / 3: 무관한 문장
+        cells = [c for c in asset.cells if c.strip()]
+        if kind == 0:
+            return asset.text
+        if kind == 1:
+            return f"{asset.title} 관련하여 " + ", ".join(random.sample(cells, min(max(1, len(cells) // 2), len(cells)))) + " 항목을 관리한다."
+        if kind == 2:
+            return random.choice(filler) + " " + " ".join(random.sample(cells, min(2, len(cells))))
+        return " ".join(random.sample(filler, 2))
+
+    cases = []
+    for _ in range(args.cases):
+        target = random.choice(assets)
+        paragraphs = [paragraph_for(a, random.choice([1, 2, 3])) for a in random.sample(assets, 3)] + [random.choice(filler)]
+        paragraphs.insert(random.randint(0, len(paragraphs)), paragraph_for(target, random.randint(0, 3)))
+        legacy = max(SequenceMatcher(None, p, target.text).ratio() for p in paragraphs)
+        cases.append((legacy > 0.5, MarkerPlacer(paragraphs).best_match(target.text)[1]))
+
+    print(f"표 {len(assets)}개 / 사례 {len(cases)}개 (기존 방식 삽입 {sum(c[0] for c in cases)}건)")
+    for threshold in (0.5, 0.6, 0.65, 0.7, 0.75, 0.8):
+        agree = sum(legacy == (score > threshold) for legacy, score in cases) / len(cases)
+        print(f"  threshold {threshold:.2f}: 기존 판정과 일치 {agree:.1%}")
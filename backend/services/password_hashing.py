@@ -0,0 +1,69 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import os
+import threading
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+# ✅ bcrypt 해시/검증 전용 실행기
+#   - bcrypt는 일부러 느린 CPU 작업 → 이벤트 루프 / 기본 스레드풀과 분리된 작은 풀에서 실행
+#     (bcrypt C 구현은 GIL을 놓기 때문에 스레드로 충분)
+#   - 대기 작업이 MAX_PENDING을 넘으면 바로 503 (로그인 폭주가 채팅/초안 요청까지 밀어내지 않도록)
+#   - verify는 verify_and_update: 해시 설정이 바뀐 경우 새 해시를 같이 반환 (로그인 시 재해시)
+
+WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(WORKERS * 8)))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+_executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="bcrypt")
+_pending = 0
+_lock = threading.Lock()
+
+
+async def _run(fn, *args):
+    global _pending
+    with _lock:
+        if _pending >= MAX_PENDING:
+            raise HTTPException(
+                status_code=503,
+                detail="요청이 많아 잠시 후 다시 시도해주세요.",
+                headers={"Retry-After": "1"},
+            )
+        _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+    finally:
+        with _lock:
+            _pending -= 1
+
+
+async def hash_password(password: str) -> str:
+    return await _run(pwd_context.hash, password)
+
+
+async def verify_password(password: str, hashed: str) -> tuple[bool, str | None]:
+    """(일치 여부, 재해시가 필요하면 새 해시 / 아니면 None)"""
+    return await _run(pwd_context.verify_and_update, password, hashed)
+
+
+_dummy_hash = None
+
+
+async def verify_dummy(password: str) -> None:
+    """없는 이메일도 같은 bcrypt 비용을 들여 응답 시간으로 가입 여부를 알 수 없게"""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = await hash_password("dummy-password-for-timing")
+    await _run(pwd_context.verify, password, _dummy_hash)
+
+
+def stats() -> dict:
+    with _lock:
+        return {"workers": WORKERS, "pending": _pending, "max_pending": MAX_PENDING}
+
+
+def shutdown():
+    _executor.shutdown(wait=False, cancel_futures=True)
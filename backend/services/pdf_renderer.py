@@ -0,0 +1,232 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+
+from jinja2 import Environment, FileSystemLoader
+
+# ✅ 규정안 PDF 렌더링 서비스
+#   - esg_template.html은 Environment 1개로 컴파일 결과 재사용 (파일 수정 시 자동 reload)
+#   - WeasyPrint는 CPU를 오래 잡으므로 프로세스 풀에서 실행 (요청 워커를 막지 않음)
+#     torch / grpc 스레드가 도는 프로세스를 fork하면 교착될 수 있어 spawn으로 워커 생성
+#   - 렌더링된 HTML의 sha256 → static/pdf/<hash>.pdf : 같은 내용이면 다시 렌더링하지 않음
+#   - 작업(job) ID = 내용 해시. 제출 → 상태 조회 → 다운로드
+#   - TTL이 지난 PDF 파일은 제출 시점에 주기적으로 정리
+
+TEMPLATE_DIR = os.getenv("PDF_TEMPLATE_DIR", "templates")
+TEMPLATE_NAME = "esg_template.html"
+OUTPUT_DIR = Path(os.getenv("PDF_OUTPUT_DIR", "static/pdf"))
+MAX_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+FILE_TTL = float(os.getenv("PDF_CACHE_TTL", "3600"))
+EVICT_INTERVAL = float(os.getenv("PDF_EVICT_INTERVAL", "300"))
+
+_env = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
+_executor = None
+_jobs = {}  # job_id → {"status", "future", "path", "filename", "error", "submitted_at"}
+_lock = threading.Lock()
+_last_evicted = 0.0
+
+
+def _write_pdf(html: str, pdf_path: str) -> str:
+    """프로세스 풀 워커 (모듈 최상위 함수여야 pickle 가능)"""
+    from weasyprint import HTML
+
+    tmp_path = f"{pdf_path}.{os.getpid()}.tmp"
+    HTML(string=html).write_pdf(tmp_path)
+    os.replace(tmp_path, pdf_path)
+    return pdf_path
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def _reset_executor():
+    global _executor
+    broken, _executor = _executor, None
+    if broken is not None:
+        broken.shutdown(wait=False, cancel_futures=True)
+
+
+def render_template_html(topic: str, company: str, department: str, content: str,
+                         history=None, date: str | None = None) -> str:
+    """date는 넘긴 경우에만 템플릿에 전달 (예: today_str())"""
+    template = _env.get_template(TEMPLATE_NAME)
+    context = dict(topic=topic, company=company, department=department, content=content, history=history or [])
+    if date is not None:
+        context["date"] = date
+    return template.render(**context)
+
+
+def today_str() -> str:
+    return datetime.now().strftime("%Y.%m.%d")
+
+
+def content_hash(html: str) -> str:
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+def pdf_path_for(job_id: str) -> Path:
+    return OUTPUT_DIR / f"{job_id}.pdf"
+
+
+def evict_expired(force: bool = False) -> int:
+    """TTL이 지난 PDF / 작업 정리. 정리한 파일 수 반환"""
+    global _last_evicted
+    now = time.time()
+    if not force and now - _last_evicted < EVICT_INTERVAL:
+        return 0
+    _last_evicted = now
+
+    removed = 0
+    if OUTPUT_DIR.exists():
+        for entry in os.scandir(OUTPUT_DIR):
+            if not entry.is_file() or not entry.name.endswith(".pdf"):
+                continue
+            job_id = entry.name[:-len(".pdf")]
+            with _lock:
+                job = _jobs.get(job_id)
+                if job and job["status"] == "pending":
+                    continue
+            try:
+                if now - entry.stat().st_mtime > FILE_TTL:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+
+    with _lock:
+        for job_id in [j for j, job in _jobs.items()
+                       if job["status"] != "pending" and now - job["submitted_at"] > FILE_TTL]:
+            del _jobs[job_id]
+
+    if removed:
+        print(f"🧹 만료된 PDF {removed}개 삭제")
+    return removed
+
+
+def _on_done(job_id: str, future):
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return
+        job["future"] = None
+        # 종료(shutdown) 시 취소된 작업은 exception()이 CancelledError를 던짐
+        error = RuntimeError("작업 취소됨") if future.cancelled() else future.exception()
+        if error is None:
+            job["status"] = "done"
+        else:
+            job["status"] = "failed"
+            job["error"] = str(error)
+    if error is not None:
+        print(f"❌ PDF 렌더링 실패 ({job_id[:12]}): {error}")
+        if isinstance(error, BrokenProcessPool):
+            _reset_executor()
+
+
+def submit_pdf(html: str, filename: str = "document.pdf") -> str:
+    """렌더링된 HTML을 PDF 작업으로 제출하고 job_id(내용 해시) 반환"""
+    evict_expired()
+    job_id = content_hash(html)
+    path = pdf_path_for(job_id)
+
+    with _lock:
+        job = _jobs.get(job_id)
+        if job and job["status"] == "pending":
+            return job_id
+        if path.exists():
+            # 같은 내용 → 기존 파일 재사용 (TTL 갱신)
+            os.utime(path)
+            _jobs[job_id] = {
+                "status": "done", "future": None, "path": str(path),
+                "filename": filename, "error": None, "submitted_at": time.time(),
+            }
+            return job_id
+
+        OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+        try:
+            future = _get_executor().submit(_write_pdf, html, str(path))
+        except BrokenProcessPool:
+            _reset_executor()
+            future = _get_executor().submit(_write_pdf, html, str(path))
+        _jobs[job_id] = {
+            "status": "pending", "future": future, "path": str(path),
+            "filename": filename, "error": None, "submitted_at": time.time(),
+        }
+
+    future.add_done_callback(lambda f: _on_done(job_id, f))
+    return job_id
+
+
+def job_status(job_id: str) -> dict | None:
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            # 서버 재시작 후에도 파일이 남아 있으면 완료로 취급
+            path = pdf_path_for(job_id)
+            if len(job_id) == 64 and path.exists():
+                return {"job_id": job_id, "status": "done", "filename": f"{job_id}.pdf", "error": None}
+            return None
+        return {
+            "job_id": job_id,
+            "status": job["status"],
+            "filename": job["filename"],
+            "error": job["error"],
+        }
+
+
+def job_result_path(job_id: str) -> Path | None:
+    status = job_status(job_id)
+    if not status or status["status"] != "done":
+        return None
+    path = pdf_path_for(job_id)
+    return path if path.exists() else None
+
+
+async def render_pdf_async(html: str, filename: str = "document.pdf") -> Path:
+    """제출 후 완료까지 대기 (이벤트 루프는 막지 않음)"""
+    job_id = submit_pdf(html, filename)
+    with _lock:
+        future = _jobs[job_id]["future"] if job_id in _jobs else None
+    if future is not None:
+        try:
+            await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise  # 요청 자체가 취소된 경우
+            raise RuntimeError("PDF 렌더링 작업이 취소되었습니다")
+    path = pdf_path_for(job_id)
+    if not path.exists():
+        raise RuntimeError("PDF 렌더링 실패")
+    return path
+
+
+def render_pdf(html: str, filename: str = "document.pdf") -> Path:
+    """동기 버전 (스레드풀에서 실행되는 def 엔드포인트용)"""
+    job_id = submit_pdf(html, filename)
+    with _lock:
+        future = _jobs[job_id]["future"] if job_id in _jobs else None
+    if future is not None:
+        if future.cancelled():
+            raise RuntimeError("PDF 렌더링 작업이 취소되었습니다")
+        future.result()
+    path = pdf_path_for(job_id)
+    if not path.exists():
+        raise RuntimeError("PDF 렌더링 실패")
+    return path
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,124 @@
+import os
+import re
+import threading
+
+import numpy as np
+
+# ✅ 로컬 질문 분류기 (classify_query 앞단의 fast-path)
+#   1) 키워드 규칙: 분류 프롬프트의 규칙을 그대로 옮김 ('원문', '규정', '템플릿', 기업 사례 등)
+#   2) MiniLM 임베딩 nearest-centroid: 규칙에 안 걸린 질문 중 확실한 경우만
+#   둘 다 확신이 없으면 None → GPT 분류로 넘어감
+
+INDEX_NAMES = ("esg_Manual", "GRI_Standards", "esg_templates", "esg_sample1")
+
+KEYWORD_RULES = {
+    "GRI_Standards": [r"원문"],
+    "esg_templates": [r"규정", r"지침", r"템플릿"],
+    "esg_sample1": [
+        r"(다른|타)\s*(기업|회사|업체)|타사",
+        r"(기업|회사|업체)\S*\s.*사례",
+        r"㈜|\(주\)|주식회사",
+    ],
+}
+
+# 분류 프롬프트의 예시 + 유형별 대표 질문
+SEED_QUESTIONS = {
+    "esg_Manual": [
+        "중대성 평가 항목은 뭐야?",
+        "GRI 302-1은 어떤 지표야?",
+        "온실가스 배출량 작성 방법 알려줘",
+        "ESG 보고서 작성 예시 보여줘",
+        "이해관계자 참여는 어떻게 작성해?",
+    ],
+    "GRI_Standards": [
+        "GRI 305-1 원문 알려줘",
+        "GRI 303-3 원문 보여줘",
+    ],
+    "esg_templates": [
+        "환경경영 규정안 양식 알려줘",
+        "윤리경영 지침 템플릿 보여줘",
+        "인권 정책 규정 초안 작성해줘",
+    ],
+    "esg_sample1": [
+        "파나시아의 ESG 경영 사례 알려줘",
+        "SK는 어떻게 대응했어?",
+        "다른 중소기업의 탄소중립 활동 사례",
+    ],
+}
+
+
+def known_companies() -> list[str]:
+    raw = os.getenv("KNOWN_COMPANIES", "파나시아,SK")
+    return [c.strip() for c in raw.split(",") if c.strip()]
+
+
+class LocalQueryClassifier:
+    def __init__(self, encoder=None, min_similarity: float = 0.55, min_margin: float = 0.1):
+        self.encoder = encoder
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self._patterns = {
+            index: [re.compile(p) for p in patterns] for index, patterns in KEYWORD_RULES.items()
+        }
+        # "SK"가 "RISK" 같은 영문 단어 안에서 잡히지 않도록 영문/숫자 경계 적용
+        self._companies = [
+            re.compile(rf"(?<![A-Za-z0-9]){re.escape(c)}(?![A-Za-z0-9])") for c in known_companies()
+        ]
+        self._centroids = None
+        self._lock = threading.Lock()
+
+    def _keyword_match(self, question: str) -> set[str]:
+        matched = {
+            index for index, patterns in self._patterns.items()
+            if any(p.search(question) for p in patterns)
+        }
+        if any(company.search(question) for company in self._companies):
+            matched.add("esg_sample1")
+        return matched
+
+    def _get_centroids(self):
+        if self._centroids is None:
+            with self._lock:
+                if self._centroids is None:
+                    names = list(SEED_QUESTIONS)
+                    centroids = []
+                    for name in names:
+                        vectors = np.asarray(self.encoder(SEED_QUESTIONS[name]), dtype=np.float32)
+                        centroid = vectors.mean(axis=0)
+                        centroids.append(centroid / np.linalg.norm(centroid))
+                    self._centroids = (names, np.stack(centroids))
+        return self._centroids
+
+    def classify(self, question: str) -> dict | None:
+        matched = self._keyword_match(question)
+        if len(matched) == 1:
+            return {"index": matched.pop(), "source": "keyword", "confidence": 1.0}
+        if len(matched) > 1:
+            # 규칙끼리 충돌 → GPT 판단
+            return None
+
+        if self.encoder is None:
+            return None
+
+        names, centroids = self._get_centroids()
+        query = np.asarray(self.encoder([question]), dtype=np.float32)[0]
+        scores = centroids @ query
+        order = np.argsort(scores)[::-1]
+        best, second = float(scores[order[0]]), float(scores[order[1]])
+        # 키워드 없이는 GRI 원문/템플릿으로 보내지 않음 (프롬프트 규칙상 키워드 필수)
+        if names[order[0]] not in ("esg_Manual", "esg_sample1"):
+            return None
+        if best >= self.min_similarity and best - second >= self.min_margin:
+            return {"index": names[order[0]], "source": "centroid", "confidence": round(best, 4)}
+        return None
+
+
+def local_classifier_from_env(encoder=None) -> LocalQueryClassifier | None:
+    if os.getenv("LOCAL_CLASSIFIER_ENABLED", "true").lower() != "true":
+        return None
+    use_centroid = os.getenv("LOCAL_CLASSIFIER_CENTROID", "true").lower() == "true"
+    return LocalQueryClassifier(
+        encoder=encoder if use_centroid else None,
+        min_similarity=float(os.getenv("LOCAL_CLASSIFIER_MIN_SIMILARITY", "0.55")),
+        min_margin=float(os.getenv("LOCAL_CLASSIFIER_MIN_MARGIN", "0.1")),
+    )
@@ -2,98 +2,134 @@ from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, H
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain_openai import ChatOpenAI
 from langchain.schema import Document, SystemMessage, HumanMessage, AIMessage
-from services.vector_loader import load_vectorstore
+from services.vector_loader import load_vectorstore, register_reload_hook
+from services.translation_cache import get_translation_cache
+from services.response_cache import response_cache_from_env
+from services.query_classifier import local_classifier_from_env
+from services.table_embeddings import TableEmbeddingStore
+from services.table_assets import get_table_asset, parse_table_html
+from services.asset_manifest import tables_for_page, images_for_page
 import os
 import json
 import re
+import asyncio
 from pathlib import Path
-from sentence_transformers import SentenceTransformer, util
-from bs4 import BeautifulSoup
-import torch
-
-# ✅ 번역 캐시용
-CACHE_PATH = Path("translation_cache.json")
-translation_cache = {"ko2en": {}, "en2ko": {}}
-
-model = SentenceTransformer("all-MiniLM-L6-v2")
-
-def load_cache():
-    global translation_cache
-    if CACHE_PATH.exists():
-        with open(CACHE_PATH, "r", encoding="utf-8") as f:
-            translation_cache = json.load(f)
-
-def save_cache():
-    with open(CACHE_PATH, "w", encoding="utf-8") as f:
-        json.dump(translation_cache, f, ensure_ascii=False, indent=2)
+import threading
+import numpy as np
+from services.warmup import register_warmup
+
+# ✅ 번역 캐시용 (services.translation_cache 저장소 사용)
+
+# ✅ 문장 임베딩 모델은 첫 사용 시 로딩 (torch import 포함 → 서버 시작을 막지 않도록)
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    return _model
+
+register_warmup("sentence_transformer", get_model)
+
+table_embedding_store = TableEmbeddingStore(
+    encoder=lambda texts: get_model().encode(texts, batch_size=64, normalize_embeddings=True),
+    model_name=EMBEDDING_MODEL_NAME,
+)
+# 매뉴얼/표 재적재(reload) 후에는 표 디렉토리 변경 여부를 바로 다시 확인
+register_reload_hook(lambda index_name: table_embedding_store.invalidate())
 
 def extract_clean_table_html(html_text: str) -> str:
-    soup = BeautifulSoup(html_text, "html.parser")
-    h3 = soup.find("h3")
-    table = soup.find("table")
-    if h3 and table:
-        return f"{str(h3)}\n{str(table)}"
-    return ""
+    return parse_table_html(html_text).clean_html
 
 # ✅ GPT 번역 with 캐싱
-def translate_to_english(text: str) -> str:
-    if text in translation_cache["ko2en"]:
-        return translation_cache["ko2en"][text]
-
-    llm = ChatOpenAI(model="gpt-4o", temperature=0, openai_api_key=os.getenv("OPENAI_API_KEY"))
-    prompt = [
+def _ko2en_prompt(text: str) -> list:
+    return [
         SystemMessage(content="Translate the following Korean text to English. Respond only with the translated English."),
         HumanMessage(content=text)
     ]
-    translated = llm.invoke(prompt).content
-    translation_cache["ko2en"][text] = translated
-    return translated
 
-def translate_to_korean(text: str) -> str:
-    if text in translation_cache["en2ko"]:
-        cached = translation_cache["en2ko"][text]
+def _en2ko_prompt(text: str) -> list:
+    return [
+        SystemMessage(content="다음 영어 문장을 자연스러운 한국어로 번역해줘. 반드시 번역된 문장만 응답해."),
+        HumanMessage(content=text)
+    ]
+
+def _cached_korean(text: str) -> str | None:
+    cached = get_translation_cache().get("en2ko", text)
+    if cached is not None:
         if "훈련되었습니다" in cached or "데이터" in cached:
             print(f"❌ fallback 번역 감지됨 → 캐시 무시하고 재번역합니다: {cached}")
         else:
             return cached
+    return None
 
-    llm = ChatOpenAI(model="gpt-4o", temperature=0, openai_api_key=os.getenv("OPENAI_API_KEY"))
-    prompt = [
-        SystemMessage(content="다음 영어 문장을 자연스러운 한국어로 번역해줘. 반드시 번역된 문장만 응답해."),
-        HumanMessage(content=text)
-    ]
-    translated = llm.invoke(prompt).content
-
+def _store_korean(text: str, translated: str) -> str:
     # 다시 한번 fallback 탐지 (응답까지 의심스러울 수 있음)
     if "훈련되었습니다" in translated or "데이터" in translated:
         print("❌ 재번역도 fallback 탐지됨 → 응답 그대로 사용하지 않음")
         return "아래는 요청하신 GRI 원문 번역본 입니다.\n\n" + text
 
-    translation_cache["en2ko"][text] = translated
+    get_translation_cache().put("en2ko", text, translated)
     return translated
 
+def translate_to_english(text: str) -> str:
+    cached = get_translation_cache().get("ko2en", text)
+    if cached is not None:
+        return cached
+
+    llm = ChatOpenAI(model="gpt-4o", temperature=0, openai_api_key=os.getenv("OPENAI_API_KEY"))
+    translated = llm.invoke(_ko2en_prompt(text)).content
+    get_translation_cache().put("ko2en", text, translated)
+    return translated
+
+# 비동기 경로: 번역 캐시는 SQLite I/O (+ 첫 사용 시 이전 JSON 이전 / 정화, write-behind flush)
+#   → 이벤트 루프를 막지 않도록 스레드에서 실행
+async def translate_to_english_async(text: str) -> str:
+    cache = await asyncio.to_thread(get_translation_cache)
+    cached = await asyncio.to_thread(cache.get, "ko2en", text)
+    if cached is not None:
+        return cached
+
+    llm = ChatOpenAI(model="gpt-4o", temperature=0, openai_api_key=os.getenv("OPENAI_API_KEY"))
+    translated = (await llm.ainvoke(_ko2en_prompt(text))).content
+    await asyncio.to_thread(cache.put, "ko2en", text, translated)
+    return translated
+
+def translate_to_korean(text: str) -> str:
+    cached = _cached_korean(text)
+    if cached is not None:
+        return cached
+
+    llm = ChatOpenAI(model="gpt-4o", temperature=0, openai_api_key=os.getenv("OPENAI_API_KEY"))
+    return _store_korean(text, llm.invoke(_en2ko_prompt(text)).content)
+
+async def translate_to_korean_async(text: str) -> str:
+    cached = await asyncio.to_thread(_cached_korean, text)
+    if cached is not None:
+        return cached
+
+    llm = ChatOpenAI(model="gpt-4o", temperature=0, openai_api_key=os.getenv("OPENAI_API_KEY"))
+    translated = (await llm.ainvoke(_en2ko_prompt(text))).content
+    return await asyncio.to_thread(_store_korean, text, translated)
+
+# 번역 캐시 생성(이전 JSON 이전 + 정화)은 백그라운드 워밍업에서
+register_warmup("translation_cache", get_translation_cache)
+
 def clean_translation_cache(fallback_keywords=None):
-    fallback_keywords = fallback_keywords or ["훈련되었습니다", "데이터", "2023년", "model"]
-    cleaned = False
-
-    for direction in ["en2ko", "ko2en"]:
-        original = dict(translation_cache[direction])  # 복사
-        for k, v in original.items():
-            if any(kw in v for kw in fallback_keywords):
-                print(f"🧹 캐시 제거됨 → {k} → {v}")
-                del translation_cache[direction][k]
-                cleaned = True
-
-    if cleaned:
-        save_cache()
-        print("✅ translation_cache.json 정화 완료 및 저장됨")
+    # 로드 시 1회 정화는 get_translation_cache()가 수행. 수동 정화용으로 유지
+    removed = get_translation_cache().sanitize(fallback_keywords)
+    if removed:
+        print(f"✅ 번역 캐시 정화 완료 → {removed}건 제거")
     else:
         print("🧼 정화할 캐시 없음")
 
 # ✅ GPT 기반 질문 분류
-def classify_query(question: str) -> str:
-    llm = ChatOpenAI(model="gpt-4o", temperature=0, openai_api_key=os.getenv("OPENAI_API_KEY"))
-    system_prompt = """
+CLASSIFY_SYSTEM_PROMPT = """
 너는 ESG 문서를 다루는 AI 문서 분류기야.
 
 사용자의 질문을 읽고, 반드시 아래 4가지 중 하나를 선택해 JSON 형식으로 답해야 해. 다른 말은 절대 하지 마.
@@ -120,11 +156,8 @@ def classify_query(question: str) -> str:
 질문: "중대성 평가 항목은 뭐야?"
 응답: { "index": "esg_Manual" }
 """
-    response = llm.invoke([
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=question)
-    ]).content
 
+def _parse_classification(response: str) -> str:
     try:
         index = json.loads(response)["index"]
         print(f"✅ 선택된 벡터스토어 index_name: {index}")
@@ -133,9 +166,51 @@ def classify_query(question: str) -> str:
         print("❌ GPT 분류 실패 → 기본값 'esg_manual'")
         return "esg_Manual"
 
+# ✅ 로컬 분류기가 확신하는 경우 GPT 호출 생략
+local_classifier = local_classifier_from_env(encoder=lambda texts: get_model().encode(texts, normalize_embeddings=True))
+
+def _classify_locally(question: str) -> dict | None:
+    if local_classifier is None:
+        return None
+    routed = local_classifier.classify(question)
+    if routed:
+        print(f"⚡ 로컬 분류 → {routed['index']} ({routed['source']}, {routed['confidence']})")
+    return routed
+
+def route_query(question: str) -> dict:
+    routed = _classify_locally(question)
+    if routed:
+        return routed
+
+    llm = ChatOpenAI(model="gpt-4o", temperature=0, openai_api_key=os.getenv("OPENAI_API_KEY"))
+    response = llm.invoke([
+        SystemMessage(content=CLASSIFY_SYSTEM_PROMPT),
+        HumanMessage(content=question)
+    ]).content
+    return {"index": _parse_classification(response), "source": "llm", "confidence": None}
+
+async def route_query_async(question: str) -> dict:
+    # 임베딩 계산이 있을 수 있으므로 스레드에서 실행
+    routed = await asyncio.to_thread(_classify_locally, question)
+    if routed:
+        return routed
+
+    llm = ChatOpenAI(model="gpt-4o", temperature=0, openai_api_key=os.getenv("OPENAI_API_KEY"))
+    response = (await llm.ainvoke([
+        SystemMessage(content=CLASSIFY_SYSTEM_PROMPT),
+        HumanMessage(content=question)
+    ])).content
+    return {"index": _parse_classification(response), "source": "llm", "confidence": None}
+
+def classify_query(question: str) -> str:
+    return route_query(question)["index"]
+
+async def classify_query_async(question: str) -> str:
+    return (await route_query_async(question))["index"]
+
 # ✅ 메타데이터에서 표/이미지 추출
 def extract_metadata(documents: list[Document]) -> dict:
-    tables, images = [], []
+    tables, assets, images = [], [], []
     seen_table_paths = set()
     seen_image_paths = set()
 
@@ -149,10 +224,10 @@ def extract_metadata(documents: list[Document]) -> dict:
                 continue
             seen_table_paths.add(table_path)
 
-            full_path = Path(table_path)
-            if full_path.exists():
-                table_html = full_path.read_text(encoding="utf-8")
-                tables.append(table_html)
+            asset = get_table_asset(table_path)
+            if asset:
+                tables.append(asset.raw_html)
+                assets.append(asset)
 
         # 📌 이미지 처리
         i_raw = doc.metadata.get("images", [])
@@ -164,6 +239,7 @@ def extract_metadata(documents: list[Document]) -> dict:
 
     return {
         "tables": tables,
+        "table_assets": assets,
         "images": images
     }
 
@@ -174,35 +250,32 @@ def extract_page_number_from_path(path: str) -> int | None:
     return None
 
 def select_best_page(answer: str, table_paths: list[str], user_question: str = "") -> int | None:
-    infos = []
+    paths = []
     seen = set()
     for path in table_paths:
         if path in seen or not Path(path).exists():
             continue
         seen.add(path)
+        paths.append(path)
 
-        soup = BeautifulSoup(Path(path).read_text(encoding="utf-8"), "html.parser")
-        title = soup.find("h3").text.strip() if soup.find("h3") else ""
-        headers = [th.get_text(strip=True) for th in soup.find_all("th")]
-        cells = [td.get_text(strip=True) for td in soup.find_all("td")]
-        content = " ".join(cells[:20])[:300]
-
-        summary = f"{title}\n{', '.join(headers)}\n{content}"
-        infos.append({"path": path, "summary": summary})
+    if not paths:
+        return None
 
+    # ✅ 표 요약 임베딩은 디렉토리 단위로 캐시된 행렬에서 조회
+    vectors = table_embedding_store.vectors_for(paths)
+    infos = [(path, vector) for path, vector in zip(paths, vectors) if vector is not None]
     if not infos:
         return None
 
-    # ✅ 질문도 포함
+    # ✅ 질문도 포함 → 1회 인코딩 + 벡터화된 cosine 유사도
     query = f"{answer}\n\n{user_question}".strip()
-    query_embedding = model.encode(query, convert_to_tensor=True)
-    table_embeddings = [model.encode(i["summary"], convert_to_tensor=True) for i in infos]
-    table_embeddings = torch.stack(table_embeddings)
+    query_embedding = get_model().encode(query, normalize_embeddings=True)
+    table_embeddings = np.stack([vector for _, vector in infos])
 
-    scores = util.cos_sim(query_embedding, table_embeddings)[0]
-    best_idx = scores.argmax().item()
+    scores = table_embeddings @ query_embedding
+    best_idx = int(scores.argmax())
 
-    best_path = infos[best_idx]["path"]
+    best_path = infos[best_idx][0]
     page = extract_page_number_from_path(best_path)
     print(f"📄 유사한 표 경로: {best_path} → page{page}")
     return page
@@ -210,21 +283,16 @@ def select_best_page(answer: str, table_paths: list[str], user_question: str = "
 
 # ✅ 페이지 단위 리소스 로딩
 def load_resources_for_page(base_dir: str, page: int) -> tuple[list[str], list[str]]:
-    table_dir = Path(base_dir) / "tables_gpt"
-    tables = [str(p) for p in table_dir.glob(f"page{page}_table*.html")]
-
-    image_dir = Path(base_dir) / "images"
-    images = [str(p) for p in image_dir.glob(f"*page{page}*") if p.suffix.lower() in [".png", ".jpg", ".jpeg"]]
+    # 매니페스트 조회 (디렉토리 glob 없음)
+    tables = tables_for_page(Path(base_dir) / "tables_gpt", page)
+    images = images_for_page(Path(base_dir) / "images", page)
 
     return tables, images
 
-def generate_suggested_questions(context_snippet: str, user_question: str, index_name: str) -> list[str]:
-    # 🔒 특정 index는 질문 생성 제외
-    if index_name in ["esg_templates", "esg_sample1"]:
-        return []
+SUGGESTION_FALLBACK = ["이 항목에 대해 자세히 알려줘요.", "관련 사례가 있나요?", "작성할 때 주의할 점은 뭔가요?"]
 
-    llm = ChatOpenAI(model="gpt-4o", temperature=0, openai_api_key=os.getenv("OPENAI_API_KEY"))
-    prompt = [
+def _suggestion_prompt(context_snippet: str, user_question: str) -> list:
+    return [
         SystemMessage(content="""아래는 사용자의 질문과 관련 문서 내용입니다.
 이 둘을 참고하여, 사용자가 이어서 할 수 있는 ESG 관련 실무 질문을 3개 추천해 주세요.
 - 질문은 간결하고 구체적으로 작성해 주세요.
@@ -236,91 +304,40 @@ def generate_suggested_questions(context_snippet: str, user_question: str, index
 [문서 내용]
 {context_snippet.strip()}""")
     ]
-    try:
-        response = llm.invoke(prompt).content
-        lines = [line.strip("-•0123456789. ") for line in response.strip().split("\n") if line.strip()]
-        return lines[:3]
-    except Exception as e:
-        print("❌ 추천 질문 생성 실패:", e)
-        return ["이 항목에 대해 자세히 알려줘요.", "관련 사례가 있나요?", "작성할 때 주의할 점은 뭔가요?"]
-
 
-def ask_with_context(message: str, history: list[dict] = []) -> dict:
-    load_cache()
-    clean_translation_cache()
+def _parse_suggestions(response: str) -> list[str]:
+    lines = [line.strip("-•0123456789. ") for line in response.strip().split("\n") if line.strip()]
+    return lines[:3]
 
-    index_name = classify_query(message)
-
-    # 1. query 영어 변환 (GRI만)
-    query = translate_to_english(message) if index_name == "GRI_Standards" else message
-
-    print(f"✅ 선택된 벡터스토어 index_name: {index_name}")
-    vectorstore = load_vectorstore(index_name)
-
-    # 2. 지표 코드 추출
-    gri_codes = re.findall(r"\d{3}-\d+|\d{3}", message)
-    code_match = gri_codes[0] if gri_codes else None
+def generate_suggested_questions(context_snippet: str, user_question: str, index_name: str) -> list[str]:
+    # 🔒 특정 index는 질문 생성 제외
+    if index_name in ["esg_templates", "esg_sample1"]:
+        return []
 
-    # 3. GRI + 코드가 있는 경우 → 전체 문서 중 해당 지표 포함된 청크만 필터링
-    if index_name == "GRI_Standards" and code_match:
-        query_for_filter = code_match if code_match else query
-        all_docs = vectorstore.similarity_search(query_for_filter, k=100)
-        docs = [d for d in all_docs if code_match in d.page_content]
-        if not docs:
-            print(f"❌ 지표 '{code_match}'가 포함된 청크를 찾지 못했습니다.")
-            return {
-                "answer": f"해당 문서에서 '{code_match}'에 해당하는 내용을 찾지 못했습니다.",
-                "source": index_name,
-                "metadata": {},
-                "table_html": ""
-            }
-        print(f"🎯 '{code_match}'가 포함된 청크 개수: {len(docs)}")
-    else:
-        retriever = vectorstore.as_retriever()
-        docs = retriever.get_relevant_documents(query)
-        
-    print("📄 검색된 문서 제목 목록:")
-    for i, d in enumerate(docs):
-        title = d.metadata.get("title", "N/A")
-        chunk_id = d.metadata.get("chunk_id", f"#{i}")
-        print(f"  [{i}] {chunk_id} - {title}")
+    llm = ChatOpenAI(model="gpt-4o", temperature=0, openai_api_key=os.getenv("OPENAI_API_KEY"))
+    try:
+        response = llm.invoke(_suggestion_prompt(context_snippet, user_question)).content
+        return _parse_suggestions(response)
+    except Exception as e:
+        print("❌ 추천 질문 생성 실패:", e)
+        return list(SUGGESTION_FALLBACK)
 
-    # 4. context 생성
-    main_title = docs[0].metadata.get("title", "")
-    same_title_docs = [d for d in docs if d.metadata.get("title", "") == main_title]
-    context = "\n\n".join([d.page_content for d in same_title_docs])
-    print("📦 선택된 context 문서 개수:", len(same_title_docs))
-    for i, doc in enumerate(same_title_docs):
-        print(f"--- 문서 {i+1} ---")
-        print("📌 title:", doc.metadata.get("title"))
-        print("📄 pages:", doc.metadata.get("pages"))
-        print("📁 tables:", doc.metadata.get("tables"))
-        print("🖼️ images:", doc.metadata.get("images"))
-    print("📚 context preview:")
-    print(context[:500])
-    print("........")
+async def generate_suggested_questions_async(context_snippet: str, user_question: str, index_name: str) -> list[str]:
+    if index_name in ["esg_templates", "esg_sample1"]:
+        return []
 
-    # 5. hallucination 필터 (GRI 지표가 질문에 포함됐는데 context에 없으면 차단)
-    if index_name == "GRI_Standards" and gri_codes:
-        asked_codes = set(re.findall(r"\d{3}-\d+", message))
-        context_codes = set(re.findall(r"\d{3}-\d+", context))
-        hallucinated = not asked_codes.issubset(context_codes)
+    llm = ChatOpenAI(model="gpt-4o", temperature=0, openai_api_key=os.getenv("OPENAI_API_KEY"))
+    try:
+        response = (await llm.ainvoke(_suggestion_prompt(context_snippet, user_question))).content
+        return _parse_suggestions(response)
+    except Exception as e:
+        print("❌ 추천 질문 생성 실패:", e)
+        return list(SUGGESTION_FALLBACK)
 
-        if hallucinated:
-            print("❌ GPT 응답 필터링: 질문한 GRI 지표가 context에 없음 → hallucination 가능성")
-            return {
-                "answer": "해당 문서에 요청하신 GRI 지표에 대한 내용이 없습니다.",
-                "source": index_name,
-                "metadata": {},
-                "table_html": ""
-            }
-    # 6. table/image 분석
-    want_table = any(k in message.lower() for k in ["표", "테이블", "table"])
-    want_image = any(k in message.lower() for k in ["이미지", "사진", "image", "그림"])
-    metadata = {"tables": [], "images": []}
-    table_html = ""
 
-    # 5. GPT에게 메시지 전달
+# ✅ 답변 생성용 메시지 구성 (sync/async 파이프라인 공용)
+def build_answer_messages(index_name: str, context: str, query: str) -> list:
+    # GPT에게 메시지 전달
     if index_name == "GRI_Standards":
         format_instruction = """
     📝 반드시 아래 형식을 따라 응답하세요:
@@ -440,13 +457,67 @@ def ask_with_context(message: str, history: list[dict] = []) -> dict:
         """),
         HumanMessage(content=query)
     ]
+    return messages
 
 
-    llm = ChatOpenAI(model="gpt-4o", temperature=0, openai_api_key=os.getenv("OPENAI_API_KEY"))
-    output = llm.invoke(messages).content
-    print("🔍 GPT 응답:", output)
+def select_context(docs: list[Document]) -> tuple[list[Document], str]:
+    print("📄 검색된 문서 제목 목록:")
+    for i, d in enumerate(docs):
+        title = d.metadata.get("title", "N/A")
+        chunk_id = d.metadata.get("chunk_id", f"#{i}")
+        print(f"  [{i}] {chunk_id} - {title}")
+
+    main_title = docs[0].metadata.get("title", "")
+    same_title_docs = [d for d in docs if d.metadata.get("title", "") == main_title]
+    context = "\n\n".join([d.page_content for d in same_title_docs])
+    print("📦 선택된 context 문서 개수:", len(same_title_docs))
+    for i, doc in enumerate(same_title_docs):
+        print(f"--- 문서 {i+1} ---")
+        print("📌 title:", doc.metadata.get("title"))
+        print("📄 pages:", doc.metadata.get("pages"))
+        print("📁 tables:", doc.metadata.get("tables"))
+        print("🖼️ images:", doc.metadata.get("images"))
+    print("📚 context preview:")
+    print(context[:500])
+    print("........")
+    return same_title_docs, context
+
+
+def not_found_response(index_name: str, code_match: str) -> dict:
+    print(f"❌ 지표 '{code_match}'가 포함된 청크를 찾지 못했습니다.")
+    return {
+        "answer": f"해당 문서에서 '{code_match}'에 해당하는 내용을 찾지 못했습니다.",
+        "source": index_name,
+        "metadata": {},
+        "table_html": ""
+    }
+
+
+# hallucination 필터 (GRI 지표가 질문에 포함됐는데 context에 없으면 차단)
+def check_hallucination(index_name: str, message: str, gri_codes: list[str], context: str) -> dict | None:
+    if index_name == "GRI_Standards" and gri_codes:
+        asked_codes = set(re.findall(r"\d{3}-\d+", message))
+        context_codes = set(re.findall(r"\d{3}-\d+", context))
+        hallucinated = not asked_codes.issubset(context_codes)
+
+        if hallucinated:
+            print("❌ GPT 응답 필터링: 질문한 GRI 지표가 context에 없음 → hallucination 가능성")
+            return {
+                "answer": "해당 문서에 요청하신 GRI 지표에 대한 내용이 없습니다.",
+                "source": index_name,
+                "metadata": {},
+                "table_html": ""
+            }
+    return None
+
+
+# ✅ 질문이 표/이미지를 요구하면 문서 메타데이터에서 표 HTML 추출
+def collect_tables(docs: list[Document], message: str) -> tuple[dict, str]:
+    want_table = any(k in message.lower() for k in ["표", "테이블", "table"])
+    want_image = any(k in message.lower() for k in ["이미지", "사진", "image", "그림"])
+    metadata = {"tables": [], "images": []}
+    table_html = ""
 
-    # 8. table/image 추출
     if want_table or want_image:
         # ✅ 문서 전체에서 테이블/이미지 경로 추출
         extracted = extract_metadata(docs)
@@ -456,21 +527,12 @@ def ask_with_context(message: str, history: list[dict] = []) -> dict:
 
         if want_table and table_paths:
             seen_tables = set()
-            for table_path in table_paths:
-                try:
-                    # table_path가 html 태그일 경우 그대로 사용
-                    if "<table" in table_path and "</table>" in table_path:
-                        raw_html = table_path
-                    else:
-                        raw_html = Path(table_path).read_text(encoding="utf-8")
-
-                    cleaned = extract_clean_table_html(raw_html)
-                    if cleaned.strip() and cleaned not in seen_tables:
-                        table_htmls.append(cleaned)
-                        seen_tables.add(cleaned)
-
-                except Exception as e:
-                    print(f"❌ 테이블 읽기 실패: {table_path} → {e}")
+            # 이미 파싱된 표 자산 재사용 (파일 재파싱 없음)
+            for asset in extracted["table_assets"]:
+                cleaned = asset.clean_html
+                if cleaned.strip() and cleaned not in seen_tables:
+                    table_htmls.append(cleaned)
+                    seen_tables.add(cleaned)
 
         metadata = {"tables": table_paths}
         table_html = "\n<hr/>\n".join(table_htmls)
@@ -479,14 +541,256 @@ def ask_with_context(message: str, history: list[dict] = []) -> dict:
         print(f"📎 table paths: {table_paths}")
         print(f"🖼 image list: {image_paths}")
 
-    # 9. 번역 여부
+    return metadata, table_html
+
+
+# ✅ 응답 캐시 (정확 일치 + 임베딩 유사도)
+response_cache = response_cache_from_env(encoder=lambda text: get_model().encode(text, normalize_embeddings=True))
+# 벡터스토어 reload / 재적재 후에는 이전 인덱스로 만든 답변을 버림 (None이면 전체)
+if response_cache is not None:
+    register_reload_hook(lambda index_name: response_cache.clear(index_name))
+
+def cache_payload(result: dict, docs: list[Document]) -> dict:
+    return {"response": result, "chunk_ids": [d.metadata.get("chunk_id") for d in docs]}
+
+
+def ask_with_context(message: str, history: list[dict] = []) -> dict:
+    routing = route_query(message)
+    index_name = routing["index"]
+
+    cached = response_cache.lookup(message, index_name) if response_cache else None
+    if cached:
+        print("♻️ 응답 캐시 적중")
+        return {**cached["response"], "routing": routing}
+
+    # 1. query 영어 변환 (GRI만)
+    query = translate_to_english(message) if index_name == "GRI_Standards" else message
+
+    print(f"✅ 선택된 벡터스토어 index_name: {index_name}")
+    vectorstore = load_vectorstore(index_name)
+
+    # 2. 지표 코드 추출
+    gri_codes = re.findall(r"\d{3}-\d+|\d{3}", message)
+    code_match = gri_codes[0] if gri_codes else None
+
+    # 3. GRI + 코드가 있는 경우 → 전체 문서 중 해당 지표 포함된 청크만 필터링
+    if index_name == "GRI_Standards" and code_match:
+        all_docs = vectorstore.similarity_search(code_match, k=100)
+        docs = [d for d in all_docs if code_match in d.page_content]
+        if not docs:
+            return not_found_response(index_name, code_match)
+        print(f"🎯 '{code_match}'가 포함된 청크 개수: {len(docs)}")
+    else:
+        retriever = vectorstore.as_retriever()
+        docs = retriever.get_relevant_documents(query)
+
+    # 4. context 생성
+    _, context = select_context(docs)
+
+    # 5. hallucination 필터
+    blocked = check_hallucination(index_name, message, gri_codes, context)
+    if blocked:
+        return blocked
+
+    # 6. GPT 답변 생성
+    messages = build_answer_messages(index_name, context, query)
+    llm = ChatOpenAI(model="gpt-4o", temperature=0, openai_api_key=os.getenv("OPENAI_API_KEY"))
+    output = llm.invoke(messages).content
+    print("🔍 GPT 응답:", output)
+
+    # 7. table/image 추출
+    metadata, table_html = collect_tables(docs, message)
+
+    # 8. 번역 여부
     final_answer = translate_to_korean(output) if index_name == "GRI_Standards" else output
 
-    save_cache()
-    return {
+    result = {
         "answer": final_answer,
         "source": index_name,
         "metadata": metadata,
         "table_html": table_html,
-        "suggested_questions": generate_suggested_questions(context, message, index_name)
+        "suggested_questions": generate_suggested_questions(context, message, index_name),
+        "routing": routing
     }
+    if response_cache:
+        response_cache.store(message, index_name, cache_payload(result, docs))
+    return result
+
+
+# ✅ 비동기 파이프라인: 서로 의존하지 않는 단계는 동시에 실행
+#   classify → (번역 ∥ 벡터스토어 로딩 ∥ 코드 기반 검색) → (답변 ∥ 추천 질문 ∥ 표 추출) → 한국어 번역
+async def retrieve_context_async(message: str, index_name: str) -> dict:
+    """검색 → context 생성까지 수행. 조기 종료 시 {"response": ...} 반환"""
+    print(f"✅ 선택된 벡터스토어 index_name: {index_name}")
+
+    gri_codes = re.findall(r"\d{3}-\d+|\d{3}", message)
+    code_match = gri_codes[0] if gri_codes else None
+
+    # 1. 영어 번역(GRI만)과 벡터스토어 로딩을 동시에 시작
+    query_task = asyncio.create_task(translate_to_english_async(message)) if index_name == "GRI_Standards" else None
+    vectorstore = await asyncio.to_thread(load_vectorstore, index_name)
+
+    try:
+        # 2. 코드 기반 검색은 번역 결과가 필요 없으므로 번역과 겹쳐서 실행
+        if index_name == "GRI_Standards" and code_match:
+            all_docs = await asyncio.to_thread(vectorstore.similarity_search, code_match, k=100)
+            docs = [d for d in all_docs if code_match in d.page_content]
+            if not docs:
+                return {"index_name": index_name, "docs": [], "response": not_found_response(index_name, code_match)}
+            print(f"🎯 '{code_match}'가 포함된 청크 개수: {len(docs)}")
+            query = await query_task
+        else:
+            query = await query_task if query_task else message
+            retriever = vectorstore.as_retriever()
+            docs = await asyncio.to_thread(retriever.get_relevant_documents, query)
+    finally:
+        if query_task and not query_task.done():
+            query_task.cancel()
+
+    _, context = select_context(docs)
+
+    blocked = check_hallucination(index_name, message, gri_codes, context)
+    if blocked:
+        return {"index_name": index_name, "docs": docs, "response": blocked}
+
+    return {"index_name": index_name, "query": query, "docs": docs, "context": context}
+
+
+async def lookup_cached_response(message: str, index_name: str) -> dict | None:
+    if response_cache is None:
+        return None
+    # 유사도 조회는 임베딩 계산이 필요하므로 스레드에서 실행
+    return await asyncio.to_thread(response_cache.lookup, message, index_name)
+
+
+async def store_cached_response(message: str, index_name: str, result: dict, docs: list[Document]):
+    if response_cache is not None:
+        await asyncio.to_thread(response_cache.store, message, index_name, cache_payload(result, docs))
+
+
+async def ask_with_context_async(message: str, history: list[dict] = []) -> dict:
+    routing = await route_query_async(message)
+    index_name = routing["index"]
+
+    cached = await lookup_cached_response(message, index_name)
+    if cached:
+        print("♻️ 응답 캐시 적중")
+        return {**cached["response"], "routing": routing}
+
+    retrieved = await retrieve_context_async(message, index_name)
+    if "response" in retrieved:
+        return retrieved["response"]
+    index_name, docs, context = retrieved["index_name"], retrieved["docs"], retrieved["context"]
+
+    # 3. 추천 질문/표 추출은 답변과 독립적이므로 답변 생성과 동시에 실행
+    suggest_task = asyncio.create_task(generate_suggested_questions_async(context, message, index_name))
+    tables_task = asyncio.create_task(asyncio.to_thread(collect_tables, docs, message))
+
+    try:
+        messages = build_answer_messages(index_name, context, retrieved["query"])
+        llm = ChatOpenAI(model="gpt-4o", temperature=0, openai_api_key=os.getenv("OPENAI_API_KEY"))
+        output = (await llm.ainvoke(messages)).content
+        print("🔍 GPT 응답:", output)
+
+        # 4. 번역 여부
+        final_answer = await translate_to_korean_async(output) if index_name == "GRI_Standards" else output
+        metadata, table_html = await tables_task
+        suggested_questions = await suggest_task
+    except BaseException:
+        suggest_task.cancel()
+        tables_task.cancel()
+        raise
+
+    result = {
+        "answer": final_answer,
+        "source": index_name,
+        "metadata": metadata,
+        "table_html": table_html,
+        "suggested_questions": suggested_questions,
+        "routing": routing
+    }
+    await store_cached_response(message, index_name, result, docs)
+    return result
+
+
+# ✅ 스트리밍 파이프라인: meta → token* → table_html → suggested_questions → done 순서로 프레임 전송
+async def stream_with_context(message: str):
+    routing = await route_query_async(message)
+    index_name = routing["index"]
+
+    cached = await lookup_cached_response(message, index_name)
+    if cached:
+        print("♻️ 응답 캐시 적중")
+        response = cached["response"]
+        yield {"type": "meta", "index_name": index_name, "chunk_ids": cached["chunk_ids"], "routing": routing, "cached": True}
+        yield {"type": "token", "content": response["answer"]}
+        yield {"type": "table_html", "table_html": response["table_html"], "metadata": response["metadata"]}
+        yield {"type": "suggested_questions", "suggested_questions": response["suggested_questions"]}
+        yield {"type": "done", "answer": response["answer"], "source": index_name}
+        return
+
+    retrieved = await retrieve_context_async(message, index_name)
+    index_name, docs = retrieved["index_name"], retrieved["docs"]
+    yield {
+        "type": "meta",
+        "index_name": index_name,
+        "chunk_ids": [d.metadata.get("chunk_id") for d in docs],
+        "routing": routing,
+    }
+
+    if "response" in retrieved:
+        response = retrieved["response"]
+        yield {"type": "token", "content": response["answer"]}
+        yield {"type": "done", "answer": response["answer"], "source": index_name}
+        return
+
+    context = retrieved["context"]
+    suggest_task = asyncio.create_task(generate_suggested_questions_async(context, message, index_name))
+    tables_task = asyncio.create_task(asyncio.to_thread(collect_tables, docs, message))
+
+    try:
+        messages = build_answer_messages(index_name, context, retrieved["query"])
+        llm = ChatOpenAI(model="gpt-4o", temperature=0, openai_api_key=os.getenv("OPENAI_API_KEY"))
+
+        if index_name == "GRI_Standards":
+            # GRI는 영어 답변을 완성한 뒤 번역 → 번역 결과를 토큰 단위로 스트리밍
+            output = (await llm.ainvoke(messages)).content
+            print("🔍 GPT 응답:", output)
+            final_answer = await asyncio.to_thread(_cached_korean, output)
+            if final_answer is not None:
+                yield {"type": "token", "content": final_answer}
+            else:
+                parts = []
+                async for chunk in llm.astream(_en2ko_prompt(output)):
+                    if chunk.content:
+                        parts.append(chunk.content)
+                        yield {"type": "token", "content": chunk.content}
+                # fallback 탐지 시 done 프레임의 answer로 교체됨
+                final_answer = await asyncio.to_thread(_store_korean, output, "".join(parts))
+        else:
+            parts = []
+            async for chunk in llm.astream(messages):
+                if chunk.content:
+                    parts.append(chunk.content)
+                    yield {"type": "token", "content": chunk.content}
+            final_answer = "".join(parts)
+            print("🔍 GPT 응답:", final_answer)
+
+        metadata, table_html = await tables_task
+        yield {"type": "table_html", "table_html": table_html, "metadata": metadata}
+
+        suggested_questions = await suggest_task
+        yield {"type": "suggested_questions", "suggested_questions": suggested_questions}
+    except BaseException:
+        suggest_task.cancel()
+        tables_task.cancel()
+        raise
+
+    await store_cached_response(message, index_name, {
+        "answer": final_answer,
+        "source": index_name,
+        "metadata": metadata,
+        "table_html": table_html,
+        "suggested_questions": suggested_questions
+    }, docs)
+    yield {"type": "done", "answer": final_answer, "source": index_name}
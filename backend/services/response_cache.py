@@ -0,0 +1,171 @@
+from collections import OrderedDict
+import copy
+import os
+import re
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+# ✅ 챗봇 응답 캐시
+#   1차: (index_name, 정규화된 질문) 정확 일치
+#   2차: 같은 index_name 안에서 임베딩 유사도 ≥ threshold (질문의 GRI 지표 코드가 같을 때만)
+#     임베딩은 max_entries 행짜리 고정 행렬에 슬롯 단위로 저장 → 조회는 행렬곱 1번 + 마스크
+
+
+def normalize_question(question: str) -> str:
+    text = unicodedata.normalize("NFKC", question).lower()
+    text = re.sub(r"[?!.,~…·\"'“”‘’]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def question_codes(question: str) -> frozenset:
+    # "305-1 원문"과 "305-2 원문"은 임베딩이 거의 같으므로 코드가 다르면 유사 매칭 금지
+    return frozenset(re.findall(r"\d{3}-\d+|\d{3}", question))
+
+
+class ResponseCache:
+    def __init__(self, ttl: float = 3600, max_entries: int = 1000, threshold: float = 0.92,
+                 semantic: bool = True, encoder=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.semantic = semantic and encoder is not None
+        self.encoder = encoder
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # 유사 매칭용 슬롯 (첫 임베딩 때 차원을 알고 할당)
+        self._matrix = None                                       # (max_entries, dim)
+        self._slot_group = np.zeros(max_entries, dtype=np.int64)   # hash((index_name, codes))
+        self._slot_expires = np.zeros(max_entries, dtype=np.float64)  # 0 = 빈 슬롯
+        self._slot_keys = [None] * max_entries
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def _encode(self, text: str):
+        return np.asarray(self.encoder(text), dtype=np.float32)
+
+    def _release(self, entry: dict):
+        slot = entry.get("slot")
+        if slot is not None:
+            self._slot_expires[slot] = 0
+            self._slot_keys[slot] = None
+            self._free_slots.append(slot)
+
+    def _purge_expired(self, now: float):
+        expired = [k for k, e in self._entries.items() if e["expires_at"] <= now]
+        for k in expired:
+            self._release(self._entries.pop(k))
+
+    def lookup(self, question: str, index_name: str) -> dict | None:
+        key = (index_name, normalize_question(question))
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry["expires_at"] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry["payload"])
+
+            if not self.semantic:
+                self.misses += 1
+                return None
+
+            codes = question_codes(question)
+            group = hash((index_name, codes))
+            has_candidates = self._matrix is not None and bool(
+                ((self._slot_group == group) & (self._slot_expires > now)).any()
+            )
+
+        if has_candidates:
+            query = self._encode(key[1])
+            with self._lock:
+                mask = (self._slot_group == group) & (self._slot_expires > now)
+                scores = np.where(mask, self._matrix @ query, -np.inf)
+                best = int(scores.argmax())
+                best_key = self._slot_keys[best]
+                best_entry = self._entries.get(best_key) if best_key is not None else None
+                # hash 충돌 대비: 실제 index_name / 코드까지 확인
+                if (scores[best] >= self.threshold and best_entry is not None
+                        and best_key[0] == index_name and best_entry["codes"] == codes):
+                    self._entries.move_to_end(best_key)
+                    self.hits += 1
+                    self.semantic_hits += 1
+                    payload = copy.deepcopy(best_entry["payload"])
+                    print(f"♻️ 유사 질문 캐시 적중 (유사도 {scores[best]:.3f}): {best_key[1]}")
+                    return payload
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def store(self, question: str, index_name: str, payload: dict):
+        normalized = normalize_question(question)
+        embedding = self._encode(normalized) if self.semantic else None
+        now = time.time()
+
+        with self._lock:
+            key = (index_name, normalized)
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._release(old)
+            if len(self._entries) >= self.max_entries:
+                self._purge_expired(now)
+            while self._entries and len(self._entries) >= self.max_entries:
+                self._release(self._entries.popitem(last=False)[1])
+
+            codes = question_codes(question)
+            entry = {
+                "payload": copy.deepcopy(payload),
+                "codes": codes,
+                "expires_at": now + self.ttl,
+                "slot": None,
+            }
+            if embedding is not None and self._free_slots:
+                if self._matrix is None:
+                    self._matrix = np.zeros((self.max_entries, embedding.shape[-1]), dtype=np.float32)
+                slot = self._free_slots.pop()
+                self._matrix[slot] = embedding
+                self._slot_group[slot] = hash((index_name, codes))
+                self._slot_expires[slot] = entry["expires_at"]
+                self._slot_keys[slot] = key
+                entry["slot"] = slot
+            self._entries[key] = entry
+
+    def clear(self, index_name: str | None = None):
+        """index_name을 주면 해당 벡터스토어의 응답만 삭제"""
+        with self._lock:
+            keys = [k for k in self._entries if index_name is None or k[0] == index_name]
+            for key in keys:
+                self._release(self._entries.pop(key))
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "ttl": self.ttl,
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "semantic": self.semantic,
+            }
+
+
+def response_cache_from_env(encoder=None) -> ResponseCache | None:
+    if os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    return ResponseCache(
+        ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+        max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000")),
+        threshold=float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.92")),
+        semantic=os.getenv("RESPONSE_CACHE_SEMANTIC", "true").lower() == "true",
+        encoder=encoder,
+    )
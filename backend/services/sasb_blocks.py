@@ -0,0 +1,138 @@
+from bisect import bisect_right
+from collections import deque
+import threading
+
+from services.document_index import get_document_index
+from services.sasb_mapping import get_sasb_mapping
+from services.vector_loader import register_reload_hook
+
+# ✅ SASB 기준명 → 문서 블록 인덱스 (recommend-by-name)
+#   기존: 기준명마다 chunk_id 정렬 문서를 처음부터 훑으며 문서마다 `다른 기준명 in content` 검사
+#   변경: 매핑의 모든 기준명으로 Aho-Corasick 한 번 → 기준명별 등장 문서 위치(정렬 목록)
+#     블록 = [기준명 첫 등장, 그 이후 다른 기준명이 처음 등장하는 위치) → bisect + slice
+#   - 문서 인덱스 / 매핑이 바뀌면 (reload, 엑셀 수정) 다시 만듦
+#   → 결과는 기존 extract_block_for_crit와 동일
+
+
+class AhoCorasick:
+    def __init__(self, patterns: list[str]):
+        self.patterns = patterns
+        self.goto = [{}]
+        self.output = [[]]
+        for pid, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                nxt = self.goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][char] = nxt
+                    self.goto.append({})
+                    self.output.append([])
+                state = nxt
+            self.output[state].append(pid)
+
+        # 실패 링크 (BFS) + 출력 병합
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and char not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(char, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def matches(self, text: str) -> set[int]:
+        """text에 등장하는 패턴 번호 집합"""
+        found = set()
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+class SasbBlockIndex:
+    def __init__(self, documents: list, criteria: list[str]):
+        self.documents = documents
+        self._lock = threading.Lock()
+        # 빈 문자열은 모든 문서에 포함 → 자동자 대신 바로 처리
+        patterns = sorted({c for c in criteria if c})
+        self.occurrences = {c: [] for c in patterns}
+        self.occurrences[""] = list(range(len(documents)))
+        automaton = AhoCorasick(patterns)
+        for pos, doc in enumerate(documents):
+            for pid in automaton.matches(doc.page_content):
+                self.occurrences[patterns[pid]].append(pos)
+
+    def positions(self, crit: str) -> list[int]:
+        occ = self.occurrences.get(crit)
+        if occ is None:
+            # 매핑에 없는 기준명 → 한 번 훑어서 추가
+            occ = [pos for pos, doc in enumerate(self.documents) if crit in doc.page_content]
+            with self._lock:
+                self.occurrences[crit] = occ
+        return occ
+
+    def block(self, crit: str, criteria: list[str]) -> list[str]:
+        """crit 첫 등장 문서부터, criteria 중 다른 기준명이 등장하는 문서 직전까지 (chunk_id 중복 제외)"""
+        occ = self.positions(crit)
+        if not occ:
+            return []
+        start = occ[0]
+        end = len(self.documents)
+        for other in criteria:
+            if other == crit:
+                continue
+            other_occ = self.positions(other)
+            i = bisect_right(other_occ, start)
+            if i < len(other_occ) and other_occ[i] < end:
+                end = other_occ[i]
+
+        chunks, seen_chunk_ids = [], set()
+        for doc in self.documents[start:end]:
+            chunk_id = doc.metadata.get("chunk_id")
+            if chunk_id not in seen_chunk_ids:
+                seen_chunk_ids.add(chunk_id)
+                chunks.append(doc.page_content)
+        return chunks
+
+
+SASB_INDEX = "sasb"
+_index = None
+_index_sources = None
+_lock = threading.Lock()
+
+
+def get_sasb_block_index() -> SasbBlockIndex:
+    global _index, _index_sources
+    sources = (get_document_index(SASB_INDEX), get_sasb_mapping())
+    index = _index
+    if index is not None and _index_sources[0] is sources[0] and _index_sources[1] is sources[1]:
+        return index
+
+    with _lock:
+        if _index is None or _index_sources[0] is not sources[0] or _index_sources[1] is not sources[1]:
+            doc_index, mapping = sources
+            criteria = [c for crits in mapping.industries.values() for c in crits]
+            _index = SasbBlockIndex(doc_index.documents, criteria)
+            _index_sources = sources
+            print(f"🗂️ SASB 기준 블록 인덱스 생성: 기준 {len(_index.occurrences) - 1}개, 문서 {len(doc_index.documents)}개")
+        return _index
+
+
+def invalidate_sasb_block_index(index_name: str | None = None):
+    global _index, _index_sources
+    if index_name not in (None, SASB_INDEX):
+        return
+    with _lock:
+        _index, _index_sources = None, None
+
+
+register_reload_hook(invalidate_sasb_block_index)
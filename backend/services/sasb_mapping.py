@@ -0,0 +1,143 @@
+from pathlib import Path
+import json
+import os
+import threading
+import time
+
+# ✅ SASB 업종/KBZ 매핑 엑셀 → 인덱스 JSON
+#   요청마다 DataFrame 마스크 / iterrows 대신 dict 조회
+#   - 컴파일: python -m services.sasb_mapping  (또는 첫 사용 시 자동)
+#   - 엑셀이 컴파일 결과보다 새로우면 다시 컴파일
+#   - 구조
+#       industries: 산업명 → 기준명 목록 (Disclosure_Topic을 ","로 나눠 strip, 등장 순서 유지)
+#       kbz_rows:   [KBZ_Code, Mapped_SASB_Topic] (엑셀 행 순서)
+#       topic_rows: 기준명 → kbz_rows 행 번호 목록
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+INDUSTRY_MAP_PATH = BACKEND_DIR / "SASB/sasb_industries_map.xlsx"
+KBZ_MAP_PATH = BACKEND_DIR / "SASB/kbz_sasb_eng_topics_map.xlsx"
+COMPILED_PATH = Path(os.getenv("SASB_MAPPING_PATH", BACKEND_DIR / "data/sasb_mapping.json"))
+MAPPING_VERSION = 1
+
+
+def _source_mtimes(sources: list[Path]) -> list[float]:
+    return [Path(p).stat().st_mtime for p in sources]
+
+
+def compile_mapping(industry_path: Path = INDUSTRY_MAP_PATH, kbz_path: Path = KBZ_MAP_PATH) -> dict:
+    import pandas as pd
+
+    industry_df = pd.read_excel(industry_path)
+    kbz_df = pd.read_excel(kbz_path)
+    industry_df.columns = industry_df.columns.str.strip()
+    kbz_df.columns = kbz_df.columns.str.strip()
+
+    industries = {}
+    for name, raw in zip(industry_df["산업명"], industry_df["Disclosure_Topic"]):
+        if pd.isna(name):
+            continue
+        criteria = industries.setdefault(name, [])
+        if pd.isna(raw):
+            continue
+        for crit in str(raw).split(","):
+            crit = crit.strip()
+            if crit not in criteria:
+                criteria.append(crit)
+
+    kbz_rows, topic_rows = [], {}
+    for code, topic in zip(kbz_df["KBZ_Code"], kbz_df["Mapped_SASB_Topic"]):
+        topic = str(topic).strip()
+        topic_rows.setdefault(topic, []).append(len(kbz_rows))
+        kbz_rows.append([code if isinstance(code, str) else str(code), topic])
+
+    return {"industries": industries, "kbz_rows": kbz_rows, "topic_rows": topic_rows}
+
+
+class SasbMapping:
+    def __init__(self, data: dict):
+        self.industries = data["industries"]
+        self.kbz_rows = data["kbz_rows"]
+        self.topic_rows = data["topic_rows"]
+
+    def criteria_for(self, industry_name: str) -> list[str] | None:
+        """업종의 기준명 목록 (없는 업종이면 None)"""
+        return self.industries.get(industry_name)
+
+    def map_criteria(self, criteria: list[str]) -> tuple[list[dict], set[str]]:
+        """기준명 → KBZ 매핑 (엑셀 행 순서 유지), 매핑된 기준명 집합"""
+        rows = sorted(idx for crit in set(criteria) for idx in self.topic_rows.get(crit, ()))
+        mapped = [
+            {"kbz_code": self.kbz_rows[idx][0], "matched_criteria": self.kbz_rows[idx][1]}
+            for idx in rows
+        ]
+        return mapped, {item["matched_criteria"] for item in mapped}
+
+
+class SasbMappingStore:
+    def __init__(self, sources: list[Path], compiled_path: Path = COMPILED_PATH):
+        self.sources = [Path(p) for p in sources]
+        self.compiled_path = Path(compiled_path)
+        self._mapping = None
+        self._mtimes = None
+        self._lock = threading.Lock()
+
+    def _load_compiled(self, mtimes: list[float]) -> SasbMapping | None:
+        try:
+            stored = json.loads(self.compiled_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ SASB 매핑 로드 실패: {self.compiled_path} → {e}")
+            return None
+        if stored.get("version") != MAPPING_VERSION or stored.get("source_mtimes") != mtimes:
+            return None
+        return SasbMapping(stored["data"])
+
+    def rebuild(self) -> SasbMapping:
+        mtimes = _source_mtimes(self.sources)
+        start = time.perf_counter()
+        data = compile_mapping(*self.sources)
+        try:
+            self.compiled_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.compiled_path.with_name(f"{self.compiled_path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({
+                "version": MAPPING_VERSION,
+                "source_mtimes": mtimes,
+                "data": data,
+            }, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.compiled_path)
+        except OSError as e:
+            print(f"⚠️ SASB 매핑 저장 실패: {self.compiled_path} → {e}")
+        print(f"📦 SASB 매핑 컴파일: 업종 {len(data['industries'])}개, KBZ {len(data['kbz_rows'])}행 ({time.perf_counter() - start:.2f}s)")
+        mapping = SasbMapping(data)
+        with self._lock:
+            self._mapping, self._mtimes = mapping, mtimes
+        return mapping
+
+    def get(self) -> SasbMapping:
+        mtimes = _source_mtimes(self.sources)
+        if self._mapping is not None and self._mtimes == mtimes:
+            return self._mapping
+        with self._lock:
+            if self._mapping is not None and self._mtimes == mtimes:
+                return self._mapping
+            mapping = self._load_compiled(mtimes)
+            if mapping is not None:
+                self._mapping, self._mtimes = mapping, mtimes
+                return mapping
+        return self.rebuild()
+
+
+_store = None
+
+
+def get_sasb_mapping() -> SasbMapping:
+    global _store
+    if _store is None:
+        _store = SasbMappingStore([INDUSTRY_MAP_PATH, KBZ_MAP_PATH])
+    return _store.get()
+
+
+if __name__ == "__main__":
+    # 엑셀 수정 후 실행: python -m services.sasb_mapping
+    SasbMappingStore([INDUSTRY_MAP_PATH, KBZ_MAP_PATH]).rebuild()
@@ -0,0 +1,119 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+import os
+import re
+import threading
+
+from bs4 import BeautifulSoup
+
+# ✅ 표 HTML 파싱 결과 공용 캐시 (tables_gpt / tables 디렉토리)
+#   같은 파일을 라우터마다 BeautifulSoup으로 다시 파싱하지 않도록 (경로, mtime) 기준으로 1회만 파싱
+
+
+def _default_parser() -> str:
+    # 기본은 기존과 같은 html.parser (lxml은 트리가 다를 수 있음 → TABLE_HTML_PARSER=lxml 로만 사용)
+    parser = os.getenv("TABLE_HTML_PARSER", "html.parser")
+    if parser == "lxml":
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            print("⚠️ lxml 미설치 → html.parser 사용")
+            return "html.parser"
+    return parser
+
+
+PARSER = _default_parser()
+MAX_ENTRIES = int(os.getenv("TABLE_ASSET_CACHE_SIZE", "2048"))
+
+_PAGE_RE = re.compile(r"^page(\d+)_")
+
+
+@dataclass(frozen=True)
+class TableAsset:
+    path: str
+    page: int | None
+    raw_html: str
+    title: str = ""
+    h3_html: str = ""
+    table_html: str = ""
+    text: str = ""
+    headers: list[str] = field(default_factory=list)
+    cells: list[str] = field(default_factory=list)
+
+    @property
+    def has_table(self) -> bool:
+        return bool(self.table_html)
+
+    @property
+    def clean_html(self) -> str:
+        """<h3> + <table> 둘 다 있을 때만 (rag_router.extract_clean_table_html과 동일)"""
+        if self.h3_html and self.table_html:
+            return f"{self.h3_html}\n{self.table_html}"
+        return ""
+
+    @property
+    def combined_html(self) -> str:
+        """<h3>(있으면) + <table>"""
+        return (self.h3_html + "\n" if self.h3_html else "") + self.table_html
+
+    @property
+    def summary(self) -> str:
+        """표 임베딩용 요약: 제목 / 헤더 / 앞쪽 셀 내용"""
+        content = " ".join(self.cells[:20])[:300]
+        return f"{self.title}\n{', '.join(self.headers)}\n{content}"
+
+
+def page_from_path(path) -> int | None:
+    match = _PAGE_RE.match(Path(path).name)
+    return int(match.group(1)) if match else None
+
+
+def parse_table_html(html: str, path: str = "") -> TableAsset:
+    soup = BeautifulSoup(html, PARSER)
+    h3 = soup.find("h3")
+    table = soup.find("table")
+    return TableAsset(
+        path=path,
+        page=page_from_path(path) if path else None,
+        raw_html=html,
+        title=h3.text.strip() if h3 else "",
+        h3_html=str(h3) if h3 else "",
+        table_html=str(table) if table else "",
+        text=soup.get_text(separator="\n", strip=True),
+        headers=[th.get_text(strip=True) for th in soup.find_all("th")],
+        cells=[td.get_text(strip=True) for td in soup.find_all("td")],
+    )
+
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_table_asset(path) -> TableAsset | None:
+    """파일이 없으면 None. 읽기/파싱 오류는 그대로 raise"""
+    key = str(path)
+    try:
+        stat = os.stat(key)
+    except FileNotFoundError:
+        return None
+    version = (stat.st_mtime_ns, stat.st_size)
+
+    with _lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == version:
+            _cache.move_to_end(key)
+            return cached[1]
+
+    asset = parse_table_html(Path(key).read_text(encoding="utf-8"), key)
+    with _lock:
+        _cache[key] = (version, asset)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return asset
+
+
+def clear_table_assets():
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,164 @@
+from pathlib import Path
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from services.table_assets import get_table_asset
+
+# ✅ tables_gpt 디렉토리별 표 요약 임베딩 캐시
+#   - 디렉토리 안의 모든 표 요약을 한 번에 배치 인코딩해서 .npy로 저장 (mmap으로 로딩)
+#     저장 위치는 디렉토리 옆 (asset_manifest와 동일): 공개 정적 디렉토리에 쓰지 않고,
+#     디렉토리 mtime도 바꾸지 않음 (매니페스트 / 번들 fingerprint 무효화 방지)
+#   - 파일 mtime이 바뀌거나 추가/삭제된 표만 다시 인코딩
+#   - select_best_page는 질문 1회 인코딩 + 행렬 곱 1회로 끝남
+#   - 디렉토리 변경 확인(scandir)은 CHECK_INTERVAL초마다 한 번 (또는 invalidate 후)
+#   - 인코딩은 디렉토리별 잠금에서만 → 다른 디렉토리 / 캐시된 조회는 기다리지 않음
+
+CACHE_STEM = ".table_embeddings"
+CHECK_INTERVAL = float(os.getenv("TABLE_EMBEDDINGS_CHECK_INTERVAL", "60"))
+
+
+def table_summary(path: Path) -> str:
+    asset = get_table_asset(path)
+    return asset.summary if asset else ""
+
+
+class TableEmbeddingStore:
+    def __init__(self, encoder, model_name: str):
+        self.encoder = encoder
+        self.model_name = model_name
+        self._loaded = {}  # dir → (signature, {파일명: 행 번호}, 행렬, 마지막 확인 시각)
+        self._dir_locks = {}
+        self._lock = threading.Lock()
+
+    def _dir_lock(self, table_dir: Path) -> threading.Lock:
+        with self._lock:
+            return self._dir_locks.setdefault(table_dir, threading.Lock())
+
+    def invalidate(self, table_dir: Path | None = None):
+        """다음 조회 때 디렉토리 변경 여부를 바로 다시 확인"""
+        with self._lock:
+            targets = [Path(table_dir)] if table_dir is not None else list(self._loaded)
+            for d in targets:
+                if d in self._loaded:
+                    signature, files, matrix, _ = self._loaded[d]
+                    self._loaded[d] = (signature, files, matrix, 0.0)
+
+    @staticmethod
+    def _signature(table_dir: Path) -> dict:
+        return {
+            entry.name: entry.stat().st_mtime_ns
+            for entry in os.scandir(table_dir)
+            if entry.is_file() and entry.name.endswith(".html")
+        }
+
+    def _paths(self, table_dir: Path) -> tuple[Path, Path]:
+        # 예: .../tables_gpt → .../.tables_gpt.table_embeddings.npy / .json
+        stem = f".{table_dir.name}{CACHE_STEM}"
+        return table_dir.parent / f"{stem}.npy", table_dir.parent / f"{stem}.json"
+
+    def _load_from_disk(self, table_dir: Path):
+        npy_path, meta_path = self._paths(table_dir)
+        if not npy_path.exists() or not meta_path.exists():
+            return None
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if meta.get("model") != self.model_name:
+                return None
+            matrix = np.load(npy_path, mmap_mode="r")
+            if matrix.shape[0] != len(meta["files"]):
+                return None
+            return meta["files"], matrix
+        except Exception as e:
+            print(f"⚠️ 표 임베딩 캐시 로드 실패: {table_dir} → {e}")
+            return None
+
+    def _save_to_disk(self, table_dir: Path, files: dict, matrix: np.ndarray):
+        npy_path, meta_path = self._paths(table_dir)
+        try:
+            tmp_npy = npy_path.with_name(f"{npy_path.stem}.{os.getpid()}.tmp.npy")
+            np.save(tmp_npy, matrix)
+            os.replace(tmp_npy, npy_path)
+            tmp_meta = meta_path.with_name(f"{meta_path.stem}.{os.getpid()}.tmp.json")
+            tmp_meta.write_text(json.dumps({"model": self.model_name, "files": files}, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_meta, meta_path)
+        except OSError as e:
+            # 읽기 전용 디렉토리 등 → 메모리 캐시만 사용
+            print(f"⚠️ 표 임베딩 캐시 저장 실패: {table_dir} → {e}")
+
+    def _build(self, table_dir: Path, signature: dict, previous) -> tuple[dict, np.ndarray]:
+        names = sorted(signature)
+        old_files, old_matrix = previous if previous else ({}, None)
+
+        rows, to_encode = {}, []
+        for name in names:
+            old = old_files.get(name)
+            if old is not None and old["mtime_ns"] == signature[name]:
+                rows[name] = old_matrix[old["row"]]
+            else:
+                to_encode.append(name)
+
+        if to_encode:
+            summaries = []
+            for name in to_encode:
+                try:
+                    summaries.append(table_summary(table_dir / name))
+                except Exception as e:
+                    print(f"❌ 표 요약 실패: {name} → {e}")
+                    summaries.append("")
+            vectors = np.asarray(self.encoder(summaries), dtype=np.float32)
+            for name, vector in zip(to_encode, vectors):
+                rows[name] = vector
+            print(f"🧮 표 임베딩 갱신: {table_dir} ({len(to_encode)}/{len(names)}개 인코딩)")
+
+        files = {name: {"row": i, "mtime_ns": signature[name]} for i, name in enumerate(names)}
+        matrix = np.stack([rows[name] for name in names]) if names else np.zeros((0, 0), dtype=np.float32)
+        self._save_to_disk(table_dir, files, matrix)
+        return files, matrix
+
+    def get(self, table_dir: Path) -> tuple[dict, np.ndarray]:
+        """{파일명: {"row", "mtime_ns"}}, 임베딩 행렬 반환"""
+        table_dir = Path(table_dir)
+        loaded = self._loaded.get(table_dir)
+        if loaded and time.monotonic() - loaded[3] < CHECK_INTERVAL:
+            return loaded[1], loaded[2]
+
+        with self._dir_lock(table_dir):
+            loaded = self._loaded.get(table_dir)
+            if loaded and time.monotonic() - loaded[3] < CHECK_INTERVAL:
+                return loaded[1], loaded[2]
+
+            signature = self._signature(table_dir)
+            if loaded and loaded[0] == signature:
+                files, matrix = loaded[1], loaded[2]
+            else:
+                previous = self._load_from_disk(table_dir)
+                if previous and {n: f["mtime_ns"] for n, f in previous[0].items()} == signature:
+                    files, matrix = previous
+                else:
+                    files, matrix = self._build(table_dir, signature, previous)
+            with self._lock:
+                self._loaded[table_dir] = (signature, files, matrix, time.monotonic())
+            return files, matrix
+
+    def vectors_for(self, paths: list[str]) -> list:
+        """경로 순서대로 임베딩 벡터 반환 (캐시 불가한 경로는 None)"""
+        by_dir = {}
+        for path in paths:
+            by_dir.setdefault(Path(path).parent, []).append(path)
+
+        vectors = {}
+        for table_dir, dir_paths in by_dir.items():
+            try:
+                files, matrix = self.get(table_dir)
+            except OSError as e:
+                print(f"❌ 표 디렉토리 읽기 실패: {table_dir} → {e}")
+                continue
+            for path in dir_paths:
+                entry = files.get(Path(path).name)
+                if entry is not None:
+                    vectors[path] = matrix[entry["row"]]
+        return [vectors.get(path) for path in paths]
@@ -0,0 +1,282 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# ✅ 번역 캐시 저장소
+#   - get/put은 O(1) (프로세스 내 LRU + SQLite PK 조회)
+#   - put은 write-behind 버퍼에 모았다가 한 트랜잭션으로 기록 → 워커 여러 개가 동시에 써도 안전
+#   - 전체 항목 수는 max_entries로 제한 (last_used 기준 LRU 삭제, 조회 적중도 last_used 갱신)
+#   - fallback 번역 정화는 로드 시 1회만 수행
+
+LEGACY_JSON_PATH = Path("translation_cache.json")
+FALLBACK_KEYWORDS = ["훈련되었습니다", "데이터", "2023년", "model"]
+DIRECTIONS = ("ko2en", "en2ko")
+
+
+class TranslationCache(ABC):
+    @abstractmethod
+    def get(self, direction: str, text: str) -> str | None: ...
+
+    @abstractmethod
+    def put(self, direction: str, text: str, translated: str): ...
+
+    @abstractmethod
+    def delete(self, direction: str, text: str): ...
+
+    @abstractmethod
+    def sanitize(self, fallback_keywords: list[str] | None = None) -> int: ...
+
+    def flush(self):
+        pass
+
+
+class MemoryTranslationCache(TranslationCache):
+    def __init__(self, max_entries: int = 5000):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, direction, text):
+        key = (direction, text)
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, direction, text, translated):
+        key = (direction, text)
+        with self._lock:
+            self._items[key] = translated
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def delete(self, direction, text):
+        with self._lock:
+            self._items.pop((direction, text), None)
+
+    def sanitize(self, fallback_keywords=None):
+        fallback_keywords = fallback_keywords or FALLBACK_KEYWORDS
+        with self._lock:
+            bad = [k for k, v in self._items.items() if any(kw in v for kw in fallback_keywords)]
+            for k in bad:
+                del self._items[k]
+        return len(bad)
+
+
+class SQLiteTranslationCache(TranslationCache):
+    def __init__(self, path: str, max_entries: int = 50000, memory_entries: int = 2000,
+                 flush_size: int = 32, flush_interval: float = 5.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._memory = MemoryTranslationCache(memory_entries)
+        self._pending = {}
+        self._touched = set()  # 조회 적중 → 다음 flush 때 last_used 갱신
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                direction TEXT NOT NULL,
+                source TEXT NOT NULL,
+                translated TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (direction, source)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations(last_used)")
+        conn.commit()
+        # 항목 수는 flush마다 count(*) 하지 않고 추정치로 관리 (한도 초과 시에만 다시 셈)
+        self._count = conn.execute("SELECT count(*) FROM translations").fetchone()[0]
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite 커넥션은 스레드별로 하나씩
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _should_flush(self) -> bool:
+        return (
+            len(self._pending) + len(self._touched) >= self.flush_size
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        )
+
+    def _touch(self, key: tuple[str, str]):
+        with self._lock:
+            self._touched.add(key)
+            should_flush = self._should_flush()
+        if should_flush:
+            self.flush()
+
+    def get(self, direction, text):
+        key = (direction, text)
+        cached = self._memory.get(direction, text)
+        if cached is not None:
+            self._touch(key)
+            return cached
+
+        with self._lock:
+            pending = self._pending.get(key)
+        if pending is not None:
+            return pending
+
+        row = self._conn().execute(
+            "SELECT translated FROM translations WHERE direction = ? AND source = ?",
+            key
+        ).fetchone()
+        if row is None:
+            return None
+        self._memory.put(direction, text, row[0])
+        self._touch(key)
+        return row[0]
+
+    def put(self, direction, text, translated):
+        self._memory.put(direction, text, translated)
+        with self._lock:
+            self._pending[(direction, text)] = translated
+            should_flush = self._should_flush()
+        if should_flush:
+            self.flush()
+
+    def delete(self, direction, text):
+        self._memory.delete(direction, text)
+        with self._lock:
+            self._pending.pop((direction, text), None)
+        conn = self._conn()
+        deleted = conn.execute("DELETE FROM translations WHERE direction = ? AND source = ?", (direction, text)).rowcount
+        conn.commit()
+        with self._lock:
+            self._count -= deleted
+
+    def flush(self):
+        with self._lock:
+            items, self._pending = self._pending, {}
+            touched, self._touched = self._touched - items.keys(), set()
+            self._last_flush = time.monotonic()
+        if not items and not touched:
+            return
+
+        now = time.time()
+        conn = self._conn()
+        try:
+            with conn:
+                rows = [(d, src, tr, now) for (d, src), tr in items.items()]
+                inserted = conn.executemany(
+                    "INSERT OR IGNORE INTO translations (direction, source, translated, last_used) VALUES (?, ?, ?, ?)",
+                    rows
+                ).rowcount
+                if inserted < len(rows):
+                    conn.executemany(
+                        "UPDATE translations SET translated = ?, last_used = ? WHERE direction = ? AND source = ?",
+                        [(tr, now, d, src) for d, src, tr, _ in rows]
+                    )
+                if touched:
+                    conn.executemany(
+                        "UPDATE translations SET last_used = ? WHERE direction = ? AND source = ?",
+                        [(now, d, src) for d, src in touched]
+                    )
+
+                with self._lock:
+                    self._count += inserted
+                    over_limit = self._count > self.max_entries
+                if over_limit:
+                    # 추정치가 한도를 넘었을 때만 실제 개수로 맞춘 뒤 오래 사용되지 않은 항목부터 삭제
+                    # (다른 워커의 삽입/삭제는 추정치에 반영되지 않으므로)
+                    count = conn.execute("SELECT count(*) FROM translations").fetchone()[0]
+                    deleted = conn.execute("""
+                        DELETE FROM translations WHERE rowid IN (
+                            SELECT rowid FROM translations ORDER BY last_used ASC LIMIT ?
+                        )
+                    """, (max(0, count - self.max_entries),)).rowcount
+                    with self._lock:
+                        self._count = count - deleted
+        except sqlite3.Error as e:
+            print(f"❌ 번역 캐시 저장 실패: {e}")
+            with self._lock:
+                for key, value in items.items():
+                    self._pending.setdefault(key, value)
+
+    def sanitize(self, fallback_keywords=None):
+        fallback_keywords = fallback_keywords or FALLBACK_KEYWORDS
+        # 메모리 LRU는 DB 항목의 사본 → 제거 건수는 DB 기준만
+        self._memory.sanitize(fallback_keywords)
+        removed = 0
+        conn = self._conn()
+        with conn:
+            for kw in fallback_keywords:
+                removed += conn.execute(
+                    "DELETE FROM translations WHERE instr(translated, ?) > 0", (kw,)
+                ).rowcount
+        with self._lock:
+            self._count -= removed
+        return removed
+
+    def import_legacy_json(self, path: Path):
+        # 기존 translation_cache.json → SQLite 1회 이전
+        conn = self._conn()
+        if conn.execute("SELECT count(*) FROM translations").fetchone()[0] > 0 or not path.exists():
+            return
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            print(f"❌ 기존 번역 캐시 로드 실패: {path} → {e}")
+            return
+
+        now = time.time()
+        rows = [
+            (direction, src, tr, now)
+            for direction in DIRECTIONS
+            for src, tr in (data.get(direction) or {}).items()
+        ]
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO translations (direction, source, translated, last_used) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._count = conn.execute("SELECT count(*) FROM translations").fetchone()[0]
+        print(f"📥 {path} → SQLite 번역 캐시 이전 완료 ({len(rows)}건)")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_translation_cache() -> TranslationCache:
+    global _cache
+    if _cache is not None:
+        return _cache
+
+    with _cache_lock:
+        if _cache is None:
+            backend = os.getenv("TRANSLATION_CACHE_BACKEND", "sqlite").lower()
+            max_entries = int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "50000"))
+            if backend == "memory":
+                cache = MemoryTranslationCache(max_entries)
+            else:
+                cache = SQLiteTranslationCache(
+                    os.getenv("TRANSLATION_CACHE_PATH", "translation_cache.sqlite3"),
+                    max_entries=max_entries,
+                )
+                cache.import_legacy_json(LEGACY_JSON_PATH)
+                atexit.register(cache.flush)
+
+            # ✅ 로드 시 1회 정화
+            removed = cache.sanitize()
+            print(f"🧹 번역 캐시 정화 완료 → {removed}건 제거" if removed else "🧼 정화할 캐시 없음")
+            _cache = cache
+    return _cache
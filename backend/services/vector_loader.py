@@ -1,25 +1,113 @@
 from langchain_community.vectorstores import Qdrant
 from langchain_openai import OpenAIEmbeddings
+from qdrant_client import QdrantClient
 import os
+import threading
 from pathlib import Path
+from services.warmup import register_warmup
+
+# ✅ 프로세스 전역 레지스트리: Qdrant 클라이언트 1개(커넥션 풀 공유) + index_name별 벡터스토어
+_client = None
+_stores = {}
+_lock = threading.RLock()
+_reload_hooks = []
+_embedding = None
+
+
+# ✅ 임베딩 객체는 첫 벡터스토어 생성 시 만들어서 공유
+def get_embedding() -> OpenAIEmbeddings:
+    global _embedding
+    if _embedding is None:
+        with _lock:
+            if _embedding is None:
+                _embedding = OpenAIEmbeddings(openai_api_key=os.getenv("OPENAI_API_KEY"))
+    return _embedding
+
+
+def get_qdrant_client() -> QdrantClient:
+    global _client
+    if _client is not None:
+        return _client
+
+    with _lock:
+        if _client is None:
+            # Qdrant 클라우드 연결
+            qdrant_url = os.getenv("QDRANT_URL")
+            qdrant_api_key = os.getenv("QDRANT_API_KEY")
+
+            if not qdrant_url or not qdrant_api_key:
+                raise ValueError("❌ QDRANT_URL과 QDRANT_API_KEY 환경변수가 필요합니다.")
+
+            _client = QdrantClient(
+                url=qdrant_url,
+                api_key=qdrant_api_key,
+                prefer_grpc=os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true",
+                timeout=int(os.getenv("QDRANT_TIMEOUT", "10")),
+            )
+            print("🔌 Qdrant 클라이언트 생성 (프로세스 전역 공유)")
+    return _client
 
-# ✅ 임베딩 객체 생성
-embedding = OpenAIEmbeddings(openai_api_key=os.getenv("OPENAI_API_KEY"))
 
 def load_vectorstore(index_name: str):
-    # Qdrant 클라우드 연결
-    qdrant_url = os.getenv("QDRANT_URL")
-    qdrant_api_key = os.getenv("QDRANT_API_KEY")
-    
-    if not qdrant_url or not qdrant_api_key:
-        raise ValueError("❌ QDRANT_URL과 QDRANT_API_KEY 환경변수가 필요합니다.")
-    
-    # Qdrant 클라이언트 생성
-    client = Qdrant(
-        url=qdrant_url,
-        api_key=qdrant_api_key,
-        collection_name=index_name,
-        embeddings=embedding
-    )
-    
-    return client
+    # 이미 만들어진 벡터스토어는 그대로 재사용 → 요청마다 핸드셰이크/TLS 설정 없음
+    store = _stores.get(index_name)
+    if store is not None:
+        return store
+
+    with _lock:
+        store = _stores.get(index_name)
+        if store is None:
+            store = Qdrant(
+                client=get_qdrant_client(),
+                collection_name=index_name,
+                embeddings=get_embedding()
+            )
+            _stores[index_name] = store
+            print(f"📦 벡터스토어 등록: {index_name}")
+    return store
+
+
+register_warmup("openai_embeddings", get_embedding)
+register_warmup("qdrant_client", get_qdrant_client)
+
+
+def register_reload_hook(hook):
+    """reload_vectorstore 호출 시 hook(index_name)을 실행 (None이면 전체 리로드)"""
+    _reload_hooks.append(hook)
+
+
+def reload_vectorstore(index_name: str | None = None):
+    global _client
+    with _lock:
+        if index_name is None:
+            # 진행 중인 요청은 이전 클라이언트에 묶인 벡터스토어를 계속 쓰고 있음
+            # → close() 하지 않고 교체만 (참조가 모두 끝나면 GC가 정리)
+            _stores.clear()
+            _client = None
+        else:
+            _stores.pop(index_name, None)
+
+    for hook in _reload_hooks:
+        try:
+            hook(index_name)
+        except Exception as e:
+            print(f"❌ 리로드 hook 실패: {hook} → {e}")
+
+    print(f"🔄 벡터스토어 리로드: {index_name or '전체'}")
+
+
+def check_vectorstore_health(index_names: list[str] | None = None) -> dict:
+    names = index_names if index_names is not None else sorted(_stores)
+    result = {}
+    try:
+        client = get_qdrant_client()
+    except Exception as e:
+        return {name: {"status": "error", "detail": str(e)} for name in names}
+
+    for name in names:
+        try:
+            info = client.get_collection(name)
+            result[name] = {"status": "ok", "points_count": info.points_count}
+        except Exception as e:
+            result[name] = {"status": "error", "detail": str(e)}
+    return result
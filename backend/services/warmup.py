@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+
+# ✅ 무거운 리소스 워밍업 레지스트리
+#   모델 / 임베딩 / 엑셀 같은 리소스는 import 시점이 아니라 첫 사용 시 로딩 (get_xxx 함수)
+#   서버 시작 후 백그라운드에서 미리 불러두고, 필수 항목이 모두 ready 여야 /ready 가 200
+#   (필수 항목이 실패하면 계속 503 → 로드밸런서가 트래픽을 보내지 않음)
+#   - 각 모듈이 register_warmup(이름, 로딩 함수, required=...) 로 등록
+#   - required=False (선택 기능) 는 실패해도 /ready 에 영향 없음 (재시도는 계속)
+#   - WARMUP_ON_STARTUP=false 면 백그라운드 워밍업 없이 바로 ready (첫 요청에서 로딩)
+
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+RETRY_INTERVAL = float(os.getenv("WARMUP_RETRY_INTERVAL", "30"))  # 실패 항목 재시도 간격 (0 = 재시도 안 함)
+
+_warmers = {}  # 이름 → 로딩 함수
+_status = {}   # 이름 → {"state": pending|loading|ready|failed, "seconds": ..., "error": ...}
+_required = {}  # 이름 → /ready 판정에 포함 여부
+_lock = threading.Lock()
+_started = False
+_finished = not WARMUP_ON_STARTUP
+
+
+def register_warmup(name: str, fn, required: bool = True):
+    with _lock:
+        _warmers[name] = fn
+        _required[name] = required
+        _status.setdefault(name, {"state": "pending"})
+
+
+def _run_one(name: str, fn):
+    with _lock:
+        _status[name] = {"state": "loading"}
+    start = time.perf_counter()
+    try:
+        fn()
+    except Exception as e:
+        # 실패해도 서버는 뜸 (해당 기능은 첫 요청에서 다시 로딩 시도), 단 ready는 아님
+        with _lock:
+            _status[name] = {"state": "failed", "seconds": round(time.perf_counter() - start, 3), "error": str(e)}
+        print(f"⚠️ 워밍업 실패: {name} → {e}")
+    else:
+        seconds = round(time.perf_counter() - start, 3)
+        with _lock:
+            _status[name] = {"state": "ready", "seconds": seconds}
+        print(f"🔥 워밍업 완료: {name} ({seconds}s)")
+
+
+def run_warmup():
+    """등록된 워밍업을 순서대로 실행 (백그라운드 스레드에서 호출)"""
+    global _finished
+    for name, fn in list(_warmers.items()):
+        _run_one(name, fn)
+    _finished = True
+
+    # 실패한 항목은 일시 장애일 수 있으므로 성공할 때까지 재시도
+    while RETRY_INTERVAL > 0:
+        with _lock:
+            failed = [name for name, s in _status.items() if s["state"] == "failed"]
+        if not failed:
+            break
+        time.sleep(RETRY_INTERVAL)
+        for name in failed:
+            _run_one(name, _warmers[name])
+
+
+def start_background_warmup():
+    global _started
+    with _lock:
+        if _started or not WARMUP_ON_STARTUP:
+            return
+        _started = True
+    threading.Thread(target=run_warmup, name="warmup", daemon=True).start()
+
+
+def readiness() -> dict:
+    with _lock:
+        components = {name: {**s, "required": _required[name]} for name, s in _status.items()}
+    required = [s for s in components.values() if s["required"]]
+    if WARMUP_ON_STARTUP:
+        ready = _finished and all(s["state"] == "ready" for s in required)
+    else:
+        ready = not any(s["state"] == "failed" for s in required)
+    return {"ready": ready, "finished": _finished, "components": components}
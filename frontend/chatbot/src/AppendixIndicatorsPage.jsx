@@ -17,7 +17,7 @@ export default function AppendixIndicatorsPage() {
 
   useEffect(() => {
       async function loadStatuses() {
-        const res = await fetch("/environment/indicator-status");
+        const res = await fetch(`/environment/indicator-status?company=${encodeURIComponent("테스트회사")}`);
         const statusMap = await res.json();
         
         const merged = appendixIndicators.map(item => ({
@@ -28,7 +28,7 @@ export default function EnvironmentIndicatorsPage() {
     console.log("▶ loadStatuses 실행");
     async function loadStatuses() {
       try {
-        const res = await fetch("/environment/indicator-status");
+        const res = await fetch(`/environment/indicator-status?company=${encodeURIComponent("테스트회사")}`);
         const statusMap = await res.json(); // e.g. { KBZ-EN00: "saved", ... }
         console.log("▶ statusMap:", statusMap);
 
@@ -73,7 +73,7 @@ export default function EnvironmentIndicatorsPage() {
 
   // 5) 최종 완료 핸들러
   async function handleComplete(code) {
-    await fetch(`/environment/complete-indicator/${code}`, { method: "POST" });
+    await fetch(`/environment/complete-indicator/${code}?company=${encodeURIComponent("테스트회사")}`, { method: "POST" });
     setItems(prev =>
       prev.map(i => i.code === code ? { ...i, status: "completed" } : i)
     );
@@ -18,7 +18,7 @@ export default function GeneralIndicatorsPage() {
 
   useEffect(() => {
       async function loadStatuses() {
-        const res = await fetch("/environment/indicator-status");
+        const res = await fetch(`/environment/indicator-status?company=${encodeURIComponent("테스트회사")}`);
         const statusMap = await res.json();
   
         const merged = generalIndicators.map(item => ({
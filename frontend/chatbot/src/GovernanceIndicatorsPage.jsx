@@ -22,7 +22,7 @@ export default function GovernanceIndicatorsPage() {
 
   useEffect(() => {
     async function loadStatuses() {
-      const res = await fetch("/environment/indicator-status");
+      const res = await fetch(`/environment/indicator-status?company=${encodeURIComponent("테스트회사")}`);
       const statusMap = await res.json();
 
       const merged = governanceIndicators.map(item => ({
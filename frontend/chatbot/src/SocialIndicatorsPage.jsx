@@ -33,7 +33,7 @@ export default function SocialIndicatorsPage() {
 
   useEffect(() => {
     async function loadStatuses() {
-      const res = await fetch("/environment/indicator-status");
+      const res = await fetch(`/environment/indicator-status?company=${encodeURIComponent("테스트회사")}`);
       const statusMap = await res.json();
 
       